@@ -4,6 +4,7 @@ Automatically detects prompt type for scenario-aware validation
 """
 
 import re
+from functools import lru_cache
 from typing import Dict, List
 
 
@@ -87,7 +88,12 @@ class ScenarioClassifier:
         }
     }
     
-    def classify(self, prompt: str) -> str:
+    def __init__(self, cache_size: int = 4096):
+        # Validation classifies the same prompt once per replayed model; memoize by
+        # text, per instance so the cache neither pins nor is shared between instances
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+    
+    def _classify(self, prompt: str) -> str:
         """
         Classify a prompt into a scenario
         
@@ -125,6 +131,10 @@ class ScenarioClassifier:
         
         return "general"
     
+    def cache_info(self):
+        """Hit/miss counts of this instance's classify cache"""
+        return self.classify.cache_info()
+    
     def classify_batch(self, prompts: List[str]) -> List[str]:
         """Classify multiple prompts"""
         return [self.classify(p) for p in prompts]
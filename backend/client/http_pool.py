@@ -0,0 +1,65 @@
+"""
+Shared HTTP connection pools
+One tuned keep-alive pool per process (and one async pool per event loop) that every
+Portkey client reuses, so concurrent replays multiplex over a few HTTP/2 connections
+instead of each provider client opening its own.
+"""
+
+import asyncio
+import logging
+import weakref
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+    logger.warning("h2 not installed, shared HTTP pool will use HTTP/1.1")
+
+POOL_LIMITS = httpx.Limits(max_keepalive_connections=64, max_connections=128)
+POOL_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+_http_client: Optional[httpx.Client] = None
+# Async clients are bound to the loop they were first used on
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide pooled httpx client"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.Client(limits=POOL_LIMITS, timeout=POOL_TIMEOUT, http2=HTTP2_AVAILABLE)
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the pooled async httpx client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(limits=POOL_LIMITS, timeout=POOL_TIMEOUT, http2=HTTP2_AVAILABLE)
+        _async_http_clients[loop] = client
+    return client
+
+
+async def close_async_http_client():
+    """Close the running loop's async pool; call it before shutting down a loop you own"""
+    client = _async_http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def close_http_clients():
+    """Close the sync pool (async pools are closed per loop by close_async_http_client)"""
+    global _http_client
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
@@ -5,8 +5,8 @@ API: https://api.portkey.ai/model-configs/pricing/{provider}/{model}
 """
 
 import requests
-from typing import Dict, Optional
-from functools import lru_cache
+import time
+from typing import Dict, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,8 +17,43 @@ class PortkeyPricingClient:
     
     BASE_URL = "https://api.portkey.ai/model-configs/pricing"
     
+    # Unit prices are recomputed (and the pricing row refetched) once a day
+    PRICE_TTL_SECONDS = 24 * 60 * 60
+    
+    # Fallback pricing estimates ($/1M tokens)
+    FALLBACK_PRICING = {
+        # OpenAI models (updated Jan 2026)
+        "gpt-4o": {"input": 2.50, "output": 10.00},
+        "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+        "gpt-4-turbo": {"input": 10.00, "output": 30.00},
+        "gpt-4": {"input": 30.00, "output": 60.00},
+        "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+        "o1-preview": {"input": 15.00, "output": 60.00},
+        "o1-mini": {"input": 3.00, "output": 12.00},
+        
+        # Anthropic models (updated Jan 2026)
+        "claude-3-5-sonnet": {"input": 3.00, "output": 15.00},
+        "claude-3-5-haiku": {"input": 0.80, "output": 4.00},
+        "claude-3-opus": {"input": 15.00, "output": 75.00},
+        "claude-3-sonnet": {"input": 3.00, "output": 15.00},
+        "claude-3-haiku": {"input": 0.25, "output": 1.25},
+        
+        # Google Gemini models
+        "gemini-2.5-pro": {"input": 1.25, "output": 5.00},
+        "gemini-2.0-flash": {"input": 0.075, "output": 0.30},
+        "gemini-1.5-pro": {"input": 1.25, "output": 5.00},
+        "gemini-1.5-flash": {"input": 0.075, "output": 0.30},
+        
+        # Vertex AI - Llama models
+        "meta.llama-3.2-90b": {"input": 0.27, "output": 0.27},
+        "meta.llama-3.1-405b": {"input": 0.80, "output": 0.80},
+        "llama-3.1-8b": {"input": 0.05, "output": 0.05},
+    }
+    
     def __init__(self):
         self._cache: Dict[str, Dict] = {}
+        # (provider, model) -> (fetched_at, (input, output, cache_read) $/token)
+        self._unit_prices: Dict[Tuple[str, str], Tuple[float, Tuple[float, float, float]]] = {}
         
     def _normalize_model_name(self, provider: str, model: str) -> tuple[str, str]:
         """Normalize provider and model names for Portkey Pricing API"""
@@ -60,7 +95,6 @@ class PortkeyPricingClient:
     
         return (api_provider, clean_model)
         
-    @lru_cache(maxsize=1000)
     def get_pricing(self, provider: str, model: str) -> Optional[Dict]:
         """
         Fetch pricing for a specific model
@@ -111,20 +145,41 @@ class PortkeyPricingClient:
             logger.error(f"💥 Unexpected error for {cache_key}: {e}")
             return None
     
-    def calculate_cost(
-        self,
-        provider: str,
-        model: str,
-        prompt_tokens: int,
-        completion_tokens: int,
-        cache_read_tokens: int = 0
-    ) -> float:
-        """Calculate cost in USD for a model call"""
+    def get_unit_prices(self, provider: str, model: str) -> Tuple[float, float, float]:
+        """
+        Per-token USD prices for (input, output, cache read) tokens
+        
+        Looked up once per (provider, model) and refreshed daily, so costing a
+        call is just arithmetic instead of a pricing round-trip.
+        """
+        prices = self.cached_unit_prices(provider, model)
+        if prices is not None:
+            return prices
+        
+        key = (provider, model)
+        now = time.time()
+        if key in self._unit_prices:
+            # Stale - drop the memoized pricing row so it is fetched again
+            self._cache.pop("/".join(self._normalize_model_name(provider, model)), None)
+        
+        prices = self._lookup_unit_prices(provider, model)
+        self._unit_prices[key] = (now, prices)
+        return prices
+    
+    def cached_unit_prices(self, provider: str, model: str) -> Optional[Tuple[float, float, float]]:
+        """Unit prices if already looked up and still fresh (never makes a request)"""
+        entry = self._unit_prices.get((provider, model))
+        if entry and time.time() - entry[0] < self.PRICE_TTL_SECONDS:
+            return entry[1]
+        return None
+    
+    def _lookup_unit_prices(self, provider: str, model: str) -> Tuple[float, float, float]:
+        """Resolve unit prices from the Pricing API, falling back to estimates"""
         pricing = self.get_pricing(provider, model)
         
         if not pricing:
             logger.debug(f"📊 Using fallback pricing for {model}")
-            return self._estimate_cost(model, prompt_tokens, completion_tokens)
+            return self._fallback_unit_prices(model)
         
         try:
             # Portkey API returns pay_as_you_go directly
@@ -132,89 +187,61 @@ class PortkeyPricingClient:
             
             if not pay_as_you_go:
                 logger.warning(f"⚠️  No pay_as_you_go pricing for {model}")
-                return self._estimate_cost(model, prompt_tokens, completion_tokens)
+                return self._fallback_unit_prices(model)
             
             # Extract prices (dollars per 1,000 tokens)
             input_price_per_1k = pay_as_you_go.get("request_token", {}).get("price", 0)
             output_price_per_1k = pay_as_you_go.get("response_token", {}).get("price", 0)
             cache_price_per_1k = pay_as_you_go.get("cache_read_input_token", {}).get("price", 0)
             
-            # Calculate cost
-            cost_usd = (
-                (prompt_tokens / 1000) * input_price_per_1k +
-                (completion_tokens / 1000) * output_price_per_1k +
-                (cache_read_tokens / 1000) * cache_price_per_1k
-            )
-            
             logger.debug(
-                f"💰 {model}: "
-                f"{prompt_tokens} input × ${input_price_per_1k:.4f}/1K + "
-                f"{completion_tokens} output × ${output_price_per_1k:.4f}/1K = "
-                f"${cost_usd:.8f}"
+                f"💰 {model}: ${input_price_per_1k:.4f}/1K input, "
+                f"${output_price_per_1k:.4f}/1K output"
             )
             
-            return cost_usd
+            return (input_price_per_1k / 1000, output_price_per_1k / 1000, cache_price_per_1k / 1000)
             
         except Exception as e:
-            logger.error(f"❌ Error calculating cost for {model}: {e}")
-            return self._estimate_cost(model, prompt_tokens, completion_tokens)
+            logger.error(f"❌ Error reading pricing for {model}: {e}")
+            return self._fallback_unit_prices(model)
+    
+    def calculate_cost(
+        self,
+        provider: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cache_read_tokens: int = 0
+    ) -> float:
+        """Calculate cost in USD for a model call"""
+        input_price, output_price, cache_price = self.get_unit_prices(provider, model)
+        return (
+            prompt_tokens * input_price +
+            completion_tokens * output_price +
+            cache_read_tokens * cache_price
+        )
     
     def _estimate_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
-        """Fallback pricing estimates ($/1M tokens)"""
-        pricing_map = {
-            # OpenAI models (updated Jan 2026)
-            "gpt-4o": {"input": 2.50, "output": 10.00},
-            "gpt-4o-mini": {"input": 0.15, "output": 0.60},
-            "gpt-4-turbo": {"input": 10.00, "output": 30.00},
-            "gpt-4": {"input": 30.00, "output": 60.00},
-            "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
-            "o1-preview": {"input": 15.00, "output": 60.00},
-            "o1-mini": {"input": 3.00, "output": 12.00},
-            
-            # Anthropic models (updated Jan 2026)
-            "claude-3-5-sonnet": {"input": 3.00, "output": 15.00},
-            "claude-3-5-haiku": {"input": 0.80, "output": 4.00},
-            "claude-3-opus": {"input": 15.00, "output": 75.00},
-            "claude-3-sonnet": {"input": 3.00, "output": 15.00},
-            "claude-3-haiku": {"input": 0.25, "output": 1.25},
-            
-            # Google Gemini models
-            "gemini-2.5-pro": {"input": 1.25, "output": 5.00},
-            "gemini-2.0-flash": {"input": 0.075, "output": 0.30},
-            "gemini-1.5-pro": {"input": 1.25, "output": 5.00},
-            "gemini-1.5-flash": {"input": 0.075, "output": 0.30},
-            
-            # Vertex AI - Llama models
-            "meta.llama-3.2-90b": {"input": 0.27, "output": 0.27},
-            "meta.llama-3.1-405b": {"input": 0.80, "output": 0.80},
-            "llama-3.1-8b": {"input": 0.05, "output": 0.05},
-        }
-        
+        """Fallback cost estimate from the static pricing table"""
+        input_price, output_price, _ = self._fallback_unit_prices(model)
+        return prompt_tokens * input_price + completion_tokens * output_price
+    
+    def _fallback_unit_prices(self, model: str) -> Tuple[float, float, float]:
+        """Fallback per-token prices (fuzzy-matched against FALLBACK_PRICING)"""
         model_lower = model.lower()
         
         # Find matching pricing (fuzzy match)
-        for key, prices in pricing_map.items():
+        for key, prices in self.FALLBACK_PRICING.items():
             if key in model_lower:
-                input_cost = (prompt_tokens / 1_000_000) * prices["input"]
-                output_cost = (completion_tokens / 1_000_000) * prices["output"]
-                total_cost = input_cost + output_cost
-                
                 logger.debug(
                     f"📊 Fallback pricing for {model} (matched '{key}'): "
-                    f"{prompt_tokens} input × ${prices['input']}/1M + "
-                    f"{completion_tokens} output × ${prices['output']}/1M = "
-                    f"${total_cost:.8f}"
+                    f"${prices['input']}/1M input, ${prices['output']}/1M output"
                 )
-                return total_cost
+                return (prices["input"] / 1_000_000, prices["output"] / 1_000_000, 0.0)
         
         # Ultra fallback: $2/1M tokens average
-        fallback_cost = ((prompt_tokens + completion_tokens) / 1_000_000) * 2.0
-        logger.warning(
-            f"⚠️  No pricing data for {model}, using default $2.00/1M: "
-            f"${fallback_cost:.8f}"
-        )
-        
-        return fallback_cost
+        logger.warning(f"⚠️  No pricing data for {model}, using default $2.00/1M")
+        return (2.0 / 1_000_000, 2.0 / 1_000_000, 0.0)
     
     def get_model_info(self, provider: str, model: str) -> Dict:
         """Get full model configuration including pricing and capabilities"""
@@ -243,7 +270,7 @@ class PortkeyPricingClient:
     def clear_cache(self):
         """Clear the pricing cache"""
         self._cache.clear()
-        self.get_pricing.cache_clear()
+        self._unit_prices.clear()
         logger.info("🧹 Pricing cache cleared")
 
 
@@ -6,7 +6,9 @@ Bypasses PostgreSQL network issues
 import os
 import requests
 import logging
-from typing import Optional, Dict
+import threading
+from typing import Optional, Dict, List, Tuple
+from cachetools import LRUCache
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
@@ -38,6 +40,11 @@ class SupabaseDB:
         }
         
         self.table = "validation_results"
+        
+        # Scores this process has stored, keyed by (prompt, model, scenario, output),
+        # so re-validating an identical output is answered without a round trip
+        self._exact_index = LRUCache(maxsize=10_000)
+        self._exact_lock = threading.Lock()
         logger.info(f"SupabaseDB initialized (REST API): {self.url}")
         logger.info(f"Table: {self.table}")
         
@@ -66,17 +73,9 @@ class SupabaseDB:
         try:
             url = f"{self.url}/rest/v1/{self.table}"
             
-            data = {
-                "input": prompt_text,
-                "provider": provider,
-                "scenario": scenario,
-                "model": model,
-                "output": output,
-                "validation_score": score,
-                "validation_method": method,
-                "confidence": confidence,
-                "procedure": procedure
-            }
+            data = self.validation_row(
+                prompt_text, model, provider, scenario, output, score, method, confidence, procedure
+            )
             
             logger.info(f"📤 Storing validation to Supabase: model={model}, score={score:.1f}, method={method}")
             logger.debug(f"   URL: {url}")
@@ -86,6 +85,7 @@ class SupabaseDB:
             
             if response.status_code in [200, 201]:
                 logger.info(f"✅ Successfully stored validation for {model}: {score}/100 (method: {method})")
+                self._index_rows([data])
                 return True
             else:
                 logger.error(f"❌ Failed to store validation: HTTP {response.status_code}")
@@ -102,6 +102,78 @@ class SupabaseDB:
             logger.error(f"❌ Unexpected error storing validation: {e}", exc_info=True)
             return False
     
+    @staticmethod
+    def validation_row(
+        prompt_text: str,
+        model: str,
+        provider: str,
+        scenario: str,
+        output: str,
+        score: float,
+        method: str,
+        confidence: str,
+        procedure: str = "validation"
+    ) -> Dict:
+        """Build a validation_results row"""
+        return {
+            "input": prompt_text,
+            "provider": provider,
+            "scenario": scenario,
+            "model": model,
+            "output": output,
+            "validation_score": score,
+            "validation_method": method,
+            "confidence": confidence,
+            "procedure": procedure
+        }
+    
+    def store_validations_bulk(self, rows: List[Dict]) -> bool:
+        """Store many validation rows in one REST call (PostgREST inserts a JSON array as one statement)"""
+        if not rows:
+            return True
+        try:
+            url = f"{self.url}/rest/v1/{self.table}"
+            
+            # Nothing reads the inserted rows back, so skip echoing them
+            headers = {**self.headers, "Prefer": "return=minimal"}
+            
+            logger.info(f"📤 Storing {len(rows)} validations to Supabase in one request")
+            
+            response = requests.post(url, headers=headers, json=rows, timeout=30)
+            
+            if response.status_code in [200, 201, 204]:
+                logger.info(f"✅ Successfully stored {len(rows)} validations")
+                self._index_rows(rows)
+                return True
+            else:
+                logger.error(f"❌ Failed to store {len(rows)} validations: HTTP {response.status_code}")
+                logger.error(f"   Response: {response.text}")
+                return False
+                
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Network error storing validations: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"❌ Unexpected error storing validations: {e}", exc_info=True)
+            return False
+    
+    def find_exact(self, prompt_text: str, model: str, scenario: str, output: str) -> Optional[Tuple[float, int]]:
+        """(average score, sample count) of validations this process stored for the same prompt and output, if any"""
+        key = (prompt_text, model, scenario, output)
+        with self._exact_lock:
+            entry = self._exact_index.get(key)
+        if entry is None:
+            return None
+        total, count = entry
+        return total / count, count
+    
+    def _index_rows(self, rows: List[Dict]):
+        with self._exact_lock:
+            for row in rows:
+                key = (row["input"], row["model"], row["scenario"], row["output"])
+                total, count = self._exact_index.get(key, (0.0, 0))
+                self._exact_index[key] = (total + row["validation_score"], count + 1)
+    
     def find_similar(
         self,
         prompt_text: str,
@@ -172,6 +244,44 @@ class SupabaseDB:
             logger.error(f"Failed to find similar prompts: {e}")
             return None
     
+    def find_candidates(
+        self,
+        models: List[str],
+        scenario: Optional[str] = None,
+        limit: int = 64
+    ) -> List[Dict]:
+        """
+        Most recent validations for any of `models` (in `scenario`, if given) in one request
+        
+        Returns:
+            Rows with input, output, model and validation_score ([] on failure)
+        """
+        try:
+            url = f"{self.url}/rest/v1/{self.table}"
+            
+            # PostgREST list filter; quote names since they may contain reserved characters
+            quoted_models = ",".join(f'"{m}"' for m in models)
+            params = {
+                "model": f"in.({quoted_models})",
+                "select": "input,output,model,validation_score",
+                "limit": limit,
+                "order": "created_at.desc"
+            }
+            if scenario:
+                params["scenario"] = f"eq.{scenario}"
+            
+            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            
+            if response.status_code == 200:
+                return response.json()
+            
+            logger.warning(f"Candidate lookup returned HTTP {response.status_code}")
+            return []
+            
+        except Exception as e:
+            logger.error(f"Failed to find candidate validations: {e}")
+            return []
+    
     def get_stats(self) -> Dict:
         """Get database statistics"""
         try:
@@ -2,20 +2,27 @@
 LLM-as-a-Judge Evaluator
 Clean architecture following SOLID principles with dependency injection
 """
+import asyncio
+import hashlib
 import json
 import logging
 import os
-from typing import List, Dict, Optional
+import weakref
+from typing import List, Dict, Optional, Tuple
 from abc import ABC, abstractmethod
-from portkey_ai import Portkey
+import diskcache
+from portkey_ai import AsyncPortkey
 
 from backend.schemas import HistoricalPrompt
 from backend.judge.schema import JudgeScore, ComparisonResult
 from backend.client.portkey_client import portkey_client
+from backend.client.http_pool import get_async_http_client
 from backend.promptbuilder.eval import EvalPromptBuilder
 
 logger = logging.getLogger(__name__)
 
+JUDGE_CACHE_TTL_SECONDS = 30 * 24 * 3600
+
 
 
 class ILLMClient(ABC):
@@ -44,8 +51,26 @@ class PortkeyLLMClient(ILLMClient):
     
     def __init__(self, api_key: str):
         self.api_key = api_key
+        # AsyncPortkey clients are bound to the loop they were created on, and the
+        # sync validation loop and replay loops call in concurrently, so keep them per loop
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncPortkey]]" = (
+            weakref.WeakKeyDictionary()
+        )
         logger.info(f"PortkeyLLMClient initialized with API key: {api_key[:8]}...")
     
+    def _get_client(self, provider: str) -> AsyncPortkey:
+        """Cached AsyncPortkey client on the shared connection pool for this loop"""
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
+            clients = self._clients[loop] = {}
+        client = clients.get(provider)
+        if client is None:
+            client = clients[provider] = AsyncPortkey(
+                api_key=self.api_key, provider=provider, http_client=get_async_http_client()
+            )
+        return client
+    
     async def create_completion(self, model: str, messages: List[Dict], 
                          temperature: float = 0.0, max_tokens: int = 500,
                          provider: str = "openai") -> Dict:
@@ -55,12 +80,11 @@ class PortkeyLLMClient(ILLMClient):
         Returns:
             Dict with 'content', 'usage', and 'response' keys
         """
-        portkey = Portkey(
-            api_key=self.api_key,
-            provider=provider
-        )
+        # Shares the replay engine's pool, so judge and replay calls multiplex
+        # over the same keep-alive connections
+        portkey = self._get_client(provider)
         
-        response = portkey.chat.completions.create(
+        response = await portkey.chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
@@ -162,7 +186,8 @@ class LLMJudge:
         self, 
         llm_client: Optional[ILLMClient] = None,
         model_selector: Optional[IJudgeModelSelector] = None,
-        cost_tracker: Optional[CostTracker] = None
+        cost_tracker: Optional[CostTracker] = None,
+        score_cache: Optional[diskcache.Cache] = None
     ):
         """
         Initialize with dependency injection
@@ -171,11 +196,16 @@ class LLMJudge:
             llm_client: LLM client implementation (default: PortkeyLLMClient)
             model_selector: Model selector (default: JudgeModelSelector)
             cost_tracker: Cost tracker (default: CostTracker)
+            score_cache: Persistent store of judge scores (default: disk cache in JUDGE_CACHE_DIR)
         """
         # Dependency Injection with sensible defaults
         self.llm_client = llm_client or self._create_default_client()
         self.model_selector = model_selector or JudgeModelSelector()
         self.cost_tracker = cost_tracker or CostTracker()
+        self.score_cache = (
+            score_cache if score_cache is not None
+            else diskcache.Cache(os.getenv("JUDGE_CACHE_DIR", ".judge_cache"))
+        )
         self.prompt_builder = EvalPromptBuilder
     
     def _create_default_client(self) -> ILLMClient:
@@ -221,6 +251,13 @@ class LLMJudge:
             
             messages = [{"role": "user", "content": eval_prompt}]
             
+            # Judging runs at temperature 0, so an identical request reuses its earlier score
+            cache_key = self._score_cache_key(judge_provider, judge_model, eval_prompt)
+            # diskcache is a blocking sqlite store, so keep it off the event loop
+            cached = await asyncio.to_thread(self.score_cache.get, cache_key)
+            if cached is not None:
+                return JudgeScore(**cached)
+            
             # Call LLM via injected client
             result = await self.llm_client.create_completion(
                 model=judge_model,
@@ -240,13 +277,44 @@ class LLMJudge:
             )
             
             # Parse response
-            score_data = json.loads(result['content'])
-            return JudgeScore(**score_data)
+            score = JudgeScore(**json.loads(result['content']))
+            await asyncio.to_thread(
+                self.score_cache.set, cache_key, score.model_dump(), expire=JUDGE_CACHE_TTL_SECONDS
+            )
+            return score
             
         except Exception as e:
             logger.error(f"LLM judge evaluation failed: {e}", exc_info=True)
             return self._create_fallback_score(str(e))
     
+    async def evaluate_batch(
+        self,
+        items: List[Tuple[HistoricalPrompt, str, str]],
+        judge_config: Optional[Dict[str, str]] = None,
+        max_concurrency: int = 10
+    ) -> List[JudgeScore]:
+        """
+        Evaluate many outputs concurrently
+        
+        Args:
+            items: (prompt, output, model_name) tuples
+            judge_config: Override default judge config (shared by all items)
+            max_concurrency: Maximum judge calls in flight at once
+        
+        Returns:
+            JudgeScores in the same order as items (fallback scores for failures)
+        """
+        if not judge_config:
+            judge_config = self.model_selector.select_model()
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def evaluate(prompt: HistoricalPrompt, output: str, model_name: str) -> JudgeScore:
+            async with semaphore:
+                return await self.evaluate_single(prompt, output, model_name, judge_config)
+        
+        return await asyncio.gather(*(evaluate(*item) for item in items))
+    
     async def compare_outputs(
         self,
         prompt: HistoricalPrompt,
@@ -319,6 +387,12 @@ class LLMJudge:
         
         return results
     
+    @staticmethod
+    def _score_cache_key(judge_provider: str, judge_model: str, eval_prompt: str) -> str:
+        """Cache key for a judge call; the eval prompt embeds the prompt, output and model"""
+        payload = json.dumps([judge_provider, judge_model, eval_prompt])
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
     def _format_messages(self, messages: List[Dict[str, str]]) -> str:
         """Format chat messages for display"""
         formatted = []
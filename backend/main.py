@@ -3,16 +3,16 @@ FastAPI Main Application
 Exposes REST API for the Cost-Quality Optimization System
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import re
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from typing import List
 import uvicorn
-import json
-from datetime import datetime
-from decimal import Decimal
 
 from backend.schemas import (
     ReplayRequest,
@@ -27,46 +27,27 @@ from backend.replay_engine import replay_engine
 from backend.quality_scorer import quality_scorer
 from backend.recommender import recommendation_engine
 
-# Setup logging
+# Setup logging - records go through a queue and are written by a listener thread,
+# so log I/O never blocks the event loop while a replay batch is running
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
-def custom_json_serializer(obj):
-    """Custom serializer for datetime objects and decimals"""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    if isinstance(obj, Decimal):
-        return float(obj)
-    raise TypeError(f"Type {type(obj)} not serializable")
-
-
-def convert_floats_in_dict(obj):
-    """Recursively convert scientific notation floats to regular floats in dict/list"""
-    if isinstance(obj, dict):
-        return {k: convert_floats_in_dict(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_floats_in_dict(item) for item in obj]
-    elif isinstance(obj, float):
-        # Convert to string without scientific notation
-        if abs(obj) < 0.0001 and obj != 0:
-            return float(f"{obj:.10f}".rstrip('0').rstrip('.'))
-        elif abs(obj) < 1:
-            return float(f"{obj:.10f}".rstrip('0').rstrip('.'))
-        else:
-            return obj
-    else:
-        return obj
-
-
 # Create FastAPI app
 app = FastAPI(
     title="Cost-Quality Optimization System",
     description="Replay historical LLM prompts across models to find optimal cost-quality trade-offs",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Enable CORS for frontend
@@ -109,14 +90,26 @@ async def replay_and_analyze(request: ReplayRequest):
             raise HTTPException(status_code=400, detail="At least 2 models required for comparison")
         
         # Step 1: Replay prompts across all models
-        results = replay_engine.replay_batch(
-            prompts=request.prompts,
-            models=request.models,
-            temperature=request.temperature,
-            max_tokens=request.max_tokens,
-            use_validation=True,
-            validation_phase="production"
-        )
+        if request.use_batch:
+            results = await replay_engine.replay_batch_bulk_async(
+                prompts=request.prompts,
+                models=request.models,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                use_validation=True,
+                validation_phase="production"
+            )
+        else:
+            results = await replay_engine.replay_batch_async(
+                prompts=request.prompts,
+                models=request.models,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                max_concurrency=request.max_concurrency,
+                early_abort_on_refusal=request.early_abort_on_refusal,
+                use_validation=True,
+                validation_phase="production"
+            )
         
         # Step 2: Calculate quality metrics per model
         metrics_dict = quality_scorer.aggregate_metrics(results)
@@ -137,18 +130,8 @@ async def replay_and_analyze(request: ReplayRequest):
         
         logger.info(f"Analysis complete. Recommended: {recommendation.recommended_model}")
         
-        # Convert to dict
-        report_dict = report.model_dump()
-        
-        # Convert scientific notation floats BEFORE JSON serialization
-        report_dict = convert_floats_in_dict(report_dict)
-        
-        # Return as JSONResponse (FastAPI handles serialization)
-        return JSONResponse(
-            content=json.loads(
-                json.dumps(report_dict, default=custom_json_serializer)
-            )
-        )
+        # Serialize in one pass with pydantic-core (cost_usd is rounded by its field serializer)
+        return Response(content=report.model_dump_json(), media_type="application/json")
         
     except ValueError as e:
         logger.error(f"Validation error: {e}")
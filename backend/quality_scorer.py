@@ -7,8 +7,15 @@ import logging
 from typing import List, Dict
 from collections import defaultdict
 import statistics
+import numpy as np
 from backend.schemas import ReplayResult, QualityMetrics
 from difflib import SequenceMatcher
+from joblib import Parallel, delayed
+
+try:
+    import stringzilla as sz
+except ImportError:
+    sz = None
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +23,10 @@ logger = logging.getLogger(__name__)
 class QualityScorer:
     """Evaluates quality of model outputs"""
     
+    def __init__(self):
+        # Thread pool shared across aggregate_metrics calls (started lazily)
+        self._pool = None
+    
     def calculate_consistency_score(self, outputs: List[str]) -> float:
         """
         Calculate consistency across multiple model outputs
@@ -43,8 +54,48 @@ class QualityScorer:
         return statistics.mean(similarities) if similarities else 0.0
     
     def _string_similarity(self, str1: str, str2: str) -> float:
-        """Calculate similarity between two strings using SequenceMatcher"""
-        return SequenceMatcher(None, str1, str2).ratio()
+        """
+        Calculate similarity between two strings as normalized edit similarity
+        
+        Uses StringZilla's SIMD Levenshtein kernel when installed (much faster on
+        multi-KB LLM outputs), falling back to difflib's SequenceMatcher.
+        """
+        if sz is None:
+            return SequenceMatcher(None, str1, str2).ratio()
+        
+        longest = max(len(str1), len(str2))
+        if longest == 0:
+            return 1.0
+        
+        # Byte-level kernel is exact for ASCII; use the codepoint-aware one otherwise
+        if str1.isascii() and str2.isascii():
+            distance = sz.edit_distance(str1, str2)
+        else:
+            distance = sz.edit_distance_unicode(str1, str2)
+        
+        return 1.0 - distance / longest
+    
+    def _get_pool(self) -> Parallel:
+        """Return the persistent thread pool, starting it on first use"""
+        if self._pool is None:
+            self._pool = Parallel(n_jobs=-1, backend="threading", return_as="generator")
+            # Entering the context keeps the workers alive between calls
+            self._pool.__enter__()
+        return self._pool
+    
+    def _consistency_scores(self, outputs_by_model: Dict[str, List[str]]) -> Dict[str, float]:
+        """Calculate consistency per model, fanning models out across the thread pool"""
+        if len(outputs_by_model) <= 1:
+            return {
+                model: self.calculate_consistency_score(outputs)
+                for model, outputs in outputs_by_model.items()
+            }
+        
+        scores = self._get_pool()(
+            delayed(self.calculate_consistency_score)(outputs)
+            for outputs in outputs_by_model.values()
+        )
+        return dict(zip(outputs_by_model.keys(), scores))
     
     def aggregate_metrics(self, results: List[ReplayResult]) -> Dict[str, QualityMetrics]:
         """
@@ -52,60 +103,74 @@ class QualityScorer:
         
         Returns: Dict mapping model name to QualityMetrics
         """
-        # Group results by model
+        # Group outputs by model (first-seen order)
         by_model = defaultdict(list)
         for result in results:
-            by_model[result.model].append(result)
+            by_model[result.model].append(result.output if result.success else None)
+        models = list(by_model)
+        
+        # Pairwise consistency dominates the cost, so compute it for all models up front
+        consistency_by_model = self._consistency_scores({
+            model: [output for output in outputs if output]
+            for model, outputs in by_model.items()
+        })
+        
+        # One column per result field; every per-model count and sum is then a
+        # single bincount over the model index instead of a Python pass per metric
+        n = len(results)
+        group_of = {model: i for i, model in enumerate(models)}
+        groups = np.fromiter((group_of[r.model] for r in results), dtype=np.intp, count=n)
+        success = np.fromiter((r.success for r in results), dtype=bool, count=n)
+        refusal = np.fromiter((r.is_refusal for r in results), dtype=bool, count=n)
+        schema_valid = np.fromiter((r.schema_valid for r in results), dtype=bool, count=n)
+        costs = np.fromiter((r.cost_usd for r in results), dtype=np.float64, count=n)
+        latencies = np.fromiter((r.latency_ms for r in results), dtype=np.float64, count=n)
+        validation = np.fromiter(
+            (np.nan if r.validation_score is None else r.validation_score for r in results),
+            dtype=np.float64, count=n
+        )
+        
+        def per_model(mask: np.ndarray, weights: np.ndarray = None) -> np.ndarray:
+            return np.bincount(
+                groups[mask], weights=None if weights is None else weights[mask], minlength=len(models)
+            )
+        
+        total_calls = np.bincount(groups, minlength=len(models))
+        successful_counts = per_model(success)
+        refusal_counts = per_model(refusal)
+        schema_counts = per_model(success & schema_valid)
+        
+        cost_mask = success & (costs > 0)
+        cost_counts, cost_sums = per_model(cost_mask), per_model(cost_mask, costs)
+        latency_mask = success & (latencies > 0)
+        latency_counts, latency_sums = per_model(latency_mask), per_model(latency_mask, latencies)
+        validation_mask = success & ~np.isnan(validation)
+        validation_counts, validation_sums = per_model(validation_mask), per_model(validation_mask, validation)
         
         # Calculate metrics for each model
         metrics = {}
         
-        for model, model_results in by_model.items():
-            total_calls = len(model_results)
-            successful = [r for r in model_results if r.success]
-            failed = [r for r in model_results if not r.success]
-            refusals = [r for r in model_results if r.is_refusal]
-            
-            successful_count = len(successful)
-            failed_count = len(failed)
-            refusal_rate = len(refusals) / total_calls if total_calls > 0 else 0.0
-            
-            # Cost metrics
-            costs = [r.cost_usd for r in successful if r.cost_usd > 0]
-            avg_cost = statistics.mean(costs) if costs else 0.0
-            total_cost = sum(costs)
-            
-            # Latency metrics
-            latencies = [r.latency_ms for r in successful if r.latency_ms > 0]
-            avg_latency = statistics.mean(latencies) if latencies else 0.0
-            p50_latency = statistics.median(latencies) if latencies else 0.0
-            p95_latency = self._percentile(latencies, 0.95) if latencies else 0.0
-            
-            # Quality scores
-            outputs = [r.output for r in successful if r.output]
-            consistency_score = self.calculate_consistency_score(outputs)
-            
-            schema_compliant = [r for r in successful if r.schema_valid]
-            schema_compliance_rate = len(schema_compliant) / successful_count if successful_count > 0 else 0.0
+        for i, model in enumerate(models):
+            calls = int(total_calls[i])
+            successful_count = int(successful_counts[i])
             
-            # Validation scores (from hybrid validator)
-            validated = [r for r in successful if r.validation_score is not None]
-            avg_validation_score = statistics.mean([r.validation_score for r in validated]) if validated else 0.0
+            # Latency percentiles need each model's own sorted sample
+            model_latencies = latencies[latency_mask & (groups == i)].tolist()
             
             metrics[model] = QualityMetrics(
                 model=model,
-                total_calls=total_calls,
+                total_calls=calls,
                 successful_calls=successful_count,
-                failed_calls=failed_count,
-                refusal_rate=refusal_rate,
-                avg_cost_per_call=avg_cost,
-                total_cost=total_cost,
-                avg_latency_ms=avg_latency,
-                p50_latency_ms=p50_latency,
-                p95_latency_ms=p95_latency,
-                consistency_score=consistency_score,
-                schema_compliance_rate=schema_compliance_rate,
-                avg_validation_score=avg_validation_score
+                failed_calls=calls - successful_count,
+                refusal_rate=refusal_counts[i] / calls if calls > 0 else 0.0,
+                avg_cost_per_call=cost_sums[i] / cost_counts[i] if cost_counts[i] else 0.0,
+                total_cost=float(cost_sums[i]),
+                avg_latency_ms=latency_sums[i] / latency_counts[i] if latency_counts[i] else 0.0,
+                p50_latency_ms=statistics.median(model_latencies) if model_latencies else 0.0,
+                p95_latency_ms=self._percentile(model_latencies, 0.95) if model_latencies else 0.0,
+                consistency_score=consistency_by_model[model],
+                schema_compliance_rate=schema_counts[i] / successful_count if successful_count > 0 else 0.0,
+                avg_validation_score=validation_sums[i] / validation_counts[i] if validation_counts[i] else 0.0
             )
         
         return metrics
@@ -0,0 +1,267 @@
+"""
+Replay Response Cache
+Exact-match cache for deterministic (temperature=0) replays: an in-process LRU in
+front of a persistent backend (local disk by default, Redis when configured), plus
+an optional semantic layer that maps paraphrased prompts onto exact-cache entries
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import diskcache
+import numpy as np
+import orjson
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def cache_key(
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    messages: List[Dict[str, Any]]
+) -> str:
+    """Hash everything that determines a completion into a cache key"""
+    payload = orjson.dumps(
+        {"m": model, "t": temperature, "mt": max_tokens, "msgs": messages},
+        option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-level response cache
+
+    Hits are served from the in-process LRU when possible and fall through to the
+    persistent backend, which survives restarts (disk) or is shared across
+    workers (Redis). Backend is chosen by REPLAY_CACHE_BACKEND: "disk" (default),
+    "redis" (uses REPLAY_CACHE_REDIS_URL) or "memory" (LRU only).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl_seconds: Optional[int] = None,
+        backend: Optional[str] = None
+    ):
+        self.ttl_seconds = ttl_seconds or int(
+            os.environ.get("REPLAY_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+        )
+        self.backend = (backend or os.environ.get("REPLAY_CACHE_BACKEND", "disk")).lower()
+
+        # TTLCache isn't thread-safe; sync replays may run on worker threads
+        self._lru = TTLCache(maxsize=maxsize, ttl=self.ttl_seconds)
+        self._lock = threading.Lock()
+
+        self._disk = None
+        self._redis = None
+        if self.backend == "disk":
+            self._disk = diskcache.Cache(os.environ.get("REPLAY_CACHE_DIR", ".replay_cache"))
+        elif self.backend == "redis":
+            # Optional dependency - only needed when Redis is selected
+            import redis
+            self._redis = redis.Redis.from_url(
+                os.environ.get("REPLAY_CACHE_REDIS_URL", "redis://localhost:6379/0")
+            )
+        elif self.backend != "memory":
+            raise ValueError(f"Unknown REPLAY_CACHE_BACKEND '{self.backend}' (use disk, redis or memory)")
+
+        logger.info(f"Replay cache: LRU({maxsize}) + {self.backend}, ttl={self.ttl_seconds}s")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached value, promoting persistent hits into the LRU"""
+        with self._lock:
+            value = self._lru.get(key)
+        if value is not None:
+            return value
+
+        value = self._backend_get(key)
+        if value is not None:
+            with self._lock:
+                self._lru[key] = value
+        return value
+
+    def set(self, key: str, value: Dict):
+        """Store a value in both levels"""
+        with self._lock:
+            self._lru[key] = value
+        try:
+            if self._disk is not None:
+                self._disk.set(key, value, expire=self.ttl_seconds)
+            elif self._redis is not None:
+                self._redis.set(f"replay:{key}", orjson.dumps(value), ex=self.ttl_seconds)
+        except Exception as e:
+            # A cache write failure must never fail the replay itself
+            logger.warning(f"Replay cache write failed ({self.backend}): {e}")
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._lru.clear()
+        if self._disk is not None:
+            self._disk.clear()
+        elif self._redis is not None:
+            keys = list(self._redis.scan_iter("replay:*"))
+            if keys:
+                self._redis.delete(*keys)
+
+    def _backend_get(self, key: str) -> Optional[Dict]:
+        try:
+            if self._disk is not None:
+                return self._disk.get(key)
+            if self._redis is not None:
+                raw = self._redis.get(f"replay:{key}")
+                return orjson.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Replay cache read failed ({self.backend}): {e}")
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_embedder() -> Callable[[List[str]], List[List[float]]]:
+    """Process-wide embedding function, loaded once and shared by every SemanticCache"""
+    # Imported lazily so chromadb only loads when the semantic cache is used
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    return DefaultEmbeddingFunction()
+
+
+class SemanticCache:
+    """
+    Paraphrase-tolerant lookup in front of LLMCache
+
+    Keeps L2-normalized prompt embeddings per (model, temperature, max_tokens)
+    bucket and maps the nearest neighbour above `threshold` cosine similarity to
+    its exact-cache key. Vectors are a flat inner-product index in numpy, which is
+    plenty for replay-sized corpora, and are persisted next to the disk cache on a
+    background thread every `persist_every` inserts: one contiguous float16 .npy
+    matrix (memory-mapped on load, each bucket upcast on first use) plus a JSON
+    sidecar of per-bucket row ranges and keys.
+
+    The default embedder is chromadb's bundled ONNX all-MiniLM-L6-v2 from
+    get_embedder(), shared across instances and loaded on first use.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        persist_every: int = 100,
+        path: Optional[str] = None
+    ):
+        self.threshold = threshold
+        self.persist_every = persist_every
+        # Sidecar path; the vector matrix lives next to it as <name>.npy
+        self.path = path or os.path.join(
+            os.environ.get("REPLAY_CACHE_DIR", ".replay_cache"), "semantic_index.json"
+        )
+        self.vectors_path = os.path.splitext(self.path)[0] + ".npy"
+        self._embed_fn = embed_fn
+        self._lock = threading.Lock()
+        # bucket -> (stacked vectors, exact-cache keys)
+        self._index: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+        self._inserts = 0
+        self._load()
+
+    def lookup(self, bucket: str, text: str) -> Optional[str]:
+        """Exact-cache key of the most similar stored prompt, if it clears the threshold"""
+        entry = self._bucket(bucket)
+        if entry is None:
+            return None
+
+        vectors, keys = entry
+        similarities = vectors @ self._embed(text)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+
+        logger.debug(f"Semantic cache hit (similarity {similarities[best]:.3f})")
+        return keys[best]
+
+    def add(self, bucket: str, text: str, key: str):
+        """Index a prompt under the exact-cache key its result was stored with"""
+        vector = self._embed(text)[np.newaxis, :]
+        entry = self._bucket(bucket)
+        with self._lock:
+            vectors, keys = entry or (np.empty((0, vector.shape[1]), dtype=np.float32), [])
+            if key in keys:
+                return
+            self._index[bucket] = (np.vstack([vectors, vector]), keys + [key])
+            self._inserts += 1
+            persist = self._inserts % self.persist_every == 0
+
+        if persist:
+            threading.Thread(target=self._persist, daemon=True).start()
+
+    def _bucket(self, bucket: str) -> Optional[Tuple[np.ndarray, List[str]]]:
+        """Bucket's (vectors, keys), upcasting rows still mapped from the float16 file"""
+        with self._lock:
+            entry = self._index.get(bucket)
+            if entry is not None and entry[0].dtype != np.float32:
+                entry = self._index[bucket] = (np.asarray(entry[0], dtype=np.float32), entry[1])
+        return entry
+
+    def _embed(self, text: str) -> np.ndarray:
+        if self._embed_fn is None:
+            self._embed_fn = get_embedder()
+        vector = np.asarray(self._embed_fn([text])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _persist(self):
+        with self._lock:
+            items = list(self._index.items())
+
+        buckets, offset = {}, 0
+        for bucket, (vectors, keys) in items:
+            buckets[bucket] = {"start": offset, "keys": list(keys)}
+            offset += len(keys)
+        matrix = np.concatenate([vectors for _, (vectors, _) in items]).astype(np.float16)
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Matrix first: a sidecar whose row count doesn't match is ignored on load
+            with open(f"{self.vectors_path}.tmp", "wb") as f:
+                np.save(f, matrix)
+            os.replace(f"{self.vectors_path}.tmp", self.vectors_path)
+            with open(f"{self.path}.tmp", "w") as f:
+                json.dump({"rows": offset, "buckets": buckets}, f)
+            os.replace(f"{self.path}.tmp", self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist semantic cache index: {e}")
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if "buckets" not in snapshot:
+            # Older index format: vectors inlined in the JSON as lists
+            self._index = {
+                bucket: (np.asarray(entry["vectors"], dtype=np.float32), entry["keys"])
+                for bucket, entry in snapshot.items()
+            }
+        else:
+            try:
+                matrix = np.load(self.vectors_path, mmap_mode="r")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load semantic cache vectors: {e}")
+                return
+            if matrix.shape[0] != snapshot["rows"]:
+                logger.warning("Semantic cache index and vectors are out of sync, starting empty")
+                return
+            self._index = {
+                bucket: (matrix[entry["start"]:entry["start"] + len(entry["keys"])], entry["keys"])
+                for bucket, entry in snapshot["buckets"].items()
+            }
+        logger.info(f"Loaded semantic cache index from {self.path}")
@@ -0,0 +1,52 @@
+"""
+Replay Batch Checkpoint
+Append-only sqlite store of finished replays so a crashed batch can resume
+without reissuing calls that already succeeded
+"""
+
+import logging
+import os
+import sqlite3
+from typing import Optional
+
+from backend.schemas import ReplayResult
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayCheckpoint:
+    """Successful ReplayResults of one batch run, keyed by replay slot"""
+
+    def __init__(self, run_id: str, directory: Optional[str] = None):
+        directory = directory or os.getenv("REPLAY_CHECKPOINT_DIR", ".")
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f".replay_batch_{run_id}.db")
+
+        self._conn = sqlite3.connect(self.path)
+        # WAL keeps each small insert cheap and readers unblocked
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS done (key TEXT PRIMARY KEY, result TEXT)")
+        self._conn.commit()
+
+        logger.info(f"Replay checkpoint at {self.path} ({self.count()} finished replays)")
+
+    def get(self, key: str) -> Optional[ReplayResult]:
+        """Return the checkpointed result for a slot, if it finished in an earlier run"""
+        row = self._conn.execute("SELECT result FROM done WHERE key = ?", (key,)).fetchone()
+        return ReplayResult.model_validate_json(row[0]) if row else None
+
+    def put(self, key: str, result: ReplayResult):
+        """Record a finished (successful) result"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO done (key, result) VALUES (?, ?)",
+            (key, result.model_dump_json())
+        )
+        self._conn.commit()
+
+    def count(self) -> int:
+        """Number of finished replays recorded so far"""
+        return self._conn.execute("SELECT COUNT(*) FROM done").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -3,17 +3,118 @@ Core Replay Engine
 Re-runs historical prompts across multiple models using Portkey Gateway
 """
 
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import json
 import time
+import types
 import logging
-from typing import List, Dict
-from portkey_ai import Portkey
+from typing import Callable, List, Dict, Optional, Tuple
+from aiolimiter import AsyncLimiter
+import orjson
+from tenacity import AsyncRetrying, Retrying, stop_after_attempt, wait_exponential_jitter
+from portkey_ai import Portkey, AsyncPortkey
 from backend.schemas import HistoricalPrompt, ReplayResult
 from backend.client.portkey_client import portkey_client
+from backend.client.http_pool import get_http_client, get_async_http_client, close_async_http_client
+from backend.replay_checkpoint import ReplayCheckpoint
+from backend.replay_cache import LLMCache, SemanticCache, cache_key as replay_cache_key, get_embedder
 import os
+import re
+import threading
+import weakref
 
 logger = logging.getLogger(__name__)
 
 
+# Phrases (lowercase) that mark a model refusal near the start of a response
+REFUSAL_PHRASES = [
+    "i cannot",
+    "i can't",
+    "i'm not able to",
+    "i am not able to",
+    "i don't have access",
+    "i cannot provide",
+    "i cannot assist",
+    "i'm sorry, but i cannot",
+    "against my programming",
+    "violates my guidelines",
+    "i'm not allowed to",
+    "i must decline",
+    "i won't be able to",
+    "i'm unable to"
+]
+
+# Single alternation so the check is one scan in C instead of a Python loop per phrase
+_REFUSAL_RE = re.compile("|".join(map(re.escape, REFUSAL_PHRASES)))
+
+# Refusals show up in the opening of a response; only this many chars are scanned
+REFUSAL_WINDOW = 200
+
+# Every refusal phrase contains one of these, so a miss on all of them is a
+# guaranteed non-refusal and skips the regex scan. Keep in sync with the list.
+_REFUSAL_MARKERS = ("i ", "i'", "my ")
+
+# HTTP statuses worth retrying: timeouts, rate limits and transient server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+# Client errors raised before any HTTP status exists (vendored OpenAI SDK names)
+RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "TimeoutException", "TransportError"}
+# Longest Retry-After we'll honour before falling back to our own backoff cap
+MAX_RETRY_AFTER_SECONDS = 60.0
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+
+
+class _LoopState:
+    """Async clients and provider limits for one event loop (they can't be shared across loops)"""
+    __slots__ = ("async_clients", "provider_limits")
+    
+    def __init__(self):
+        self.async_clients: Dict[str, AsyncPortkey] = {}
+        # family -> (semaphore, request limiter, token limiter)
+        self.provider_limits: Dict[str, tuple] = {}
+
+
+def _is_transient(error: BaseException) -> bool:
+    """True for errors a retry can fix (429/5xx, timeouts, dropped connections)"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def _retry_wait(retry_state) -> float:
+    """Honour the provider's Retry-After header, otherwise back off exponentially"""
+    error = retry_state.outcome.exception()
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return min(float(retry_after), MAX_RETRY_AFTER_SECONDS)
+    except (TypeError, ValueError):
+        return _backoff(retry_state)
+
+
+# Prompt-cache pricing relative to the normal input price, used when the pricing
+# table has no explicit cache price (Anthropic: reads 10%, writes +25%)
+CACHE_READ_PRICE_RATIO = 0.1
+CACHE_WRITE_PREMIUM = 0.25
+
+# Provider Batch APIs bill asynchronous jobs at half the list price
+BATCH_API_DISCOUNT = 0.5
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# Jobs run in a 24h completion window; stop waiting on one a little after that
+BATCH_MAX_WAIT_SECONDS = 25 * 3600
+
+# Instructions prepended when several prompts are row-marshaled into one call
+MARSHAL_INSTRUCTIONS = (
+    "Respond to each numbered prompt below independently. "
+    "Reply with only a JSON object mapping each prompt number to your answer, "
+    'for example {"1": "...", "2": "..."}.'
+)
+
+
 class ReplayEngine:
     """Replays historical LLM calls across different models via Portkey"""
     
@@ -41,6 +142,74 @@ class ReplayEngine:
             "@vertex/llama3_1@llama-3.1-8b-instruct": "@vertex/llama3_1@llama-3.1-8b-instruct",
         }
         
+        # Case-insensitive view of provider_map, so "GPT-4o" resolves like "gpt-4o"
+        self._provider_map_ci = {model.lower(): provider for model, provider in self.provider_map.items()}
+        
+        # First name token (before -, @ or /) -> provider, for models not in provider_map
+        self._prefix_map = {
+            "gpt": "openai",
+            "openai": "openai",
+            "claude": "anthropic",
+            "anthropic": "anthropic",
+            "gemini": "vertex-ai",
+            "vertex": "vertex-ai",
+        }
+        # model -> resolved provider, so each name is only inferred once
+        self._resolved_providers: Dict[str, str] = {}
+        
+        # One Portkey client per provider, all sharing one tuned HTTP/2 pool, so calls
+        # reuse keep-alive connections instead of paying a TCP/TLS handshake per replay
+        self._clients: Dict[str, Portkey] = {
+            provider: Portkey(
+                api_key=self.portkey_api_key, provider=provider, http_client=get_http_client()
+            )
+            for provider in set(self.provider_map.values())
+        }
+        self._clients_lock = threading.Lock()
+        
+        # Per-provider (max concurrent calls, requests per minute, tokens per minute)
+        # so we self-throttle just under each provider's ceiling instead of eating
+        # 429 backoffs, and one provider's limit doesn't throttle the others.
+        # Override with REPLAY_PROVIDER_LIMITS="openai=48:500:800000,anthropic=..."
+        self._provider_limits = {
+            "openai": (48, 500, 800_000),
+            "anthropic": (24, 400, 400_000),
+            "vertex-ai": (16, 300, 300_000),
+        }
+        self._default_provider_limits = (16, 300, 200_000)
+        self._provider_limits.update(self._parse_provider_limits(os.getenv("REPLAY_PROVIDER_LIMITS", "")))
+        
+        # Async clients, semaphores and limiters are bound to the loop that created
+        # them, and sync replay_batch calls on different threads each run their own
+        # loop, so every loop gets its own set
+        self._loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+        
+        # Row-marshaling: many short prompts sharing a system message go out as one call
+        self.marshal_threshold = 16  # auto-enable above this many prompts
+        self.marshal_max_tokens = 256  # ...and only for short answers
+        self.marshal_batch_size = 8
+        
+        # Shared system prompts at least this long (~1024 tokens, Anthropic's minimum
+        # cacheable prefix) are marked for prompt caching on Anthropic models
+        self.prompt_cache_min_chars = 4096
+        
+        # Attempts per call for transient failures (1 = no retries)
+        self.max_attempts = int(os.getenv("REPLAY_MAX_ATTEMPTS", "5"))
+        
+        # Response cache for deterministic (temperature=0) replays
+        self._cache = LLMCache()
+        
+        # Opt-in paraphrase layer on top of the exact cache (REPLAY_SEMANTIC_CACHE=1)
+        self._semantic_cache: Optional[SemanticCache] = None
+        if os.environ.get("REPLAY_SEMANTIC_CACHE", "").lower() in ("1", "true", "yes"):
+            self._semantic_cache = SemanticCache(
+                threshold=float(os.environ.get("REPLAY_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+            )
+            # Load the embedding model in the background so the first replay doesn't wait on it
+            threading.Thread(target=get_embedder, daemon=True).start()
+        
         logger.info("ReplayEngine initialized successfully with Model Catalog")
     
     def get_provider(self, model: str) -> str:
@@ -49,8 +218,25 @@ class ReplayEngine:
         if model in self.provider_map:
             return self.provider_map[model]
         
-        # Fuzzy match
+        provider = self._resolved_providers.get(model)
+        if provider is None:
+            provider = self._resolved_providers[model] = self._infer_provider(model)
+        return provider
+    
+    def _infer_provider(self, model: str) -> str:
+        """Resolve a model name that isn't in provider_map"""
         model_lower = model.lower()
+        
+        # Case-insensitive catalog match
+        if model_lower in self._provider_map_ci:
+            return self._provider_map_ci[model_lower]
+        
+        # Prefix match on the first name token
+        prefix = re.split(r"[-@/]", model_lower.lstrip("@"), maxsplit=1)[0]
+        if prefix in self._prefix_map:
+            return self._prefix_map[prefix]
+        
+        # Fuzzy match for names with the family buried inside (e.g. "ft:gpt-4o:org")
         if "gpt" in model_lower or "openai" in model_lower:
             return "openai"
         elif "claude" in model_lower or "anthropic" in model_lower:
@@ -62,98 +248,487 @@ class ReplayEngine:
         logger.warning(f"Unknown provider for model {model}, defaulting to openai")
         return "openai"
     
+    def _get_client(self, provider: str) -> Portkey:
+        """Return the cached Portkey client for a provider"""
+        client = self._clients.get(provider)
+        if client is None:
+            # Double-checked so concurrent callers don't each build a client
+            with self._clients_lock:
+                client = self._clients.get(provider)
+                if client is None:
+                    client = self._clients[provider] = Portkey(
+                        api_key=self.portkey_api_key, provider=provider, http_client=get_http_client()
+                    )
+        return client
+    
+    def _loop_state(self) -> _LoopState:
+        """Loop-bound async state for the running event loop"""
+        loop = asyncio.get_running_loop()
+        state = self._loop_states.get(loop)
+        if state is None:
+            state = self._loop_states[loop] = _LoopState()
+        return state
+    
+    def _provider_family(self, provider: str) -> str:
+        """Collapse catalog provider slugs (e.g. '@openai/gpt-4o') to the provider name"""
+        name = provider.lstrip("@").split("/")[0]
+        return "vertex-ai" if name == "vertex" else name
+    
+    def _get_provider_limits(self, provider: str):
+        """Return (semaphore, request limiter, token limiter) enforcing this provider's concurrency, RPM and TPM"""
+        limits = self._loop_state().provider_limits
+        family = self._provider_family(provider)
+        if family not in limits:
+            concurrency, rpm, tpm = self._provider_limits.get(family, self._default_provider_limits)
+            limits[family] = (asyncio.Semaphore(concurrency), AsyncLimiter(rpm, 60), AsyncLimiter(tpm, 60))
+        return limits[family]
+    
+    @staticmethod
+    def _parse_provider_limits(spec: str) -> Dict[str, tuple]:
+        """Parse "family=concurrency:rpm:tpm,..." into provider limit overrides"""
+        limits = {}
+        for entry in filter(None, (part.strip() for part in spec.split(","))):
+            try:
+                family, values = entry.split("=", 1)
+                concurrency, rpm, tpm = (int(v) for v in values.split(":"))
+            except ValueError:
+                logger.warning(f"Ignoring malformed REPLAY_PROVIDER_LIMITS entry '{entry}'")
+                continue
+            limits[family.strip()] = (concurrency, rpm, tpm)
+        return limits
+    
+    def _estimate_tokens(self, messages: List[Dict], max_tokens: int) -> int:
+        """Upper-bound token spend of a call for TPM throttling (~4 chars per prompt token)"""
+        chars = sum(len(m.get("content") or "") for m in messages if isinstance(m.get("content"), str))
+        return chars // 4 + max_tokens
+    
+    def _get_async_client(self, provider: str) -> AsyncPortkey:
+        """Return the cached AsyncPortkey client for a provider on the running loop"""
+        clients = self._loop_state().async_clients
+        client = clients.get(provider)
+        if client is None:
+            client = clients[provider] = AsyncPortkey(
+                api_key=self.portkey_api_key, provider=provider, http_client=get_async_http_client()
+            )
+        return client
+    
     def replay_single(
         self,
         prompt: HistoricalPrompt,
         model: str,
         temperature: float = 0.0,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        early_abort_on_refusal: bool = False,
+        cache_prefix: bool = False
     ) -> ReplayResult:
-        """Replay a single prompt with a specific model via Portkey"""
+        """
+        Replay a single prompt with a specific model via Portkey
+        
+        With early_abort_on_refusal the completion is streamed and dropped as soon
+        as its opening reads as a refusal, so refused prompts don't pay for (or wait
+        on) the rest of the output. With cache_prefix the system message is marked
+        for provider prompt caching (for system prompts shared across a batch).
+        """
         
         provider = self.get_provider(model)
         
+        cache_key = replay_cache_key(model, temperature, max_tokens, prompt.messages)
+        cached = self._get_cached(cache_key, prompt, model, temperature, max_tokens)
+        if cached:
+            return cached
+        
+        messages = (
+            self._with_cache_control(prompt.messages, self._static_prefix_len(prompt))
+            if cache_prefix else prompt.messages
+        )
+        retrying = Retrying(**self._retry_policy())
         try:
             start_time = time.time()
             
-            # Create Portkey client with provider header
+            # Cached Portkey client with provider header
             # This tells Portkey which provider's API key to use from Model Catalog
-            portkey = Portkey(
-                api_key=self.portkey_api_key,
-                provider=provider  # Required: tells Portkey which provider to route to
-            )
+            portkey = self._get_client(provider)
             
             # Call model - Portkey will use the provider API key configured in Model Catalog
-            response = portkey.chat.completions.create(
-                model=model,
-                messages=prompt.messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-            
-            latency_ms = (time.time() - start_time) * 1000
-            
-            # Extract token usage
-            usage = response.usage
-            prompt_tokens = getattr(usage, 'prompt_tokens', 0)
-            completion_tokens = getattr(usage, 'completion_tokens', 0)
-            total_tokens = getattr(usage, 'total_tokens', prompt_tokens + completion_tokens)
-            
-            # Calculate cost using Portkey Pricing API
-            try:
-                cost_usd = portkey_client.calculate_cost(
-                    provider=provider,
+            def call():
+                if early_abort_on_refusal:
+                    return self._stream_completion(
+                        portkey, model, messages, temperature, max_tokens
+                    )
+                response = portkey.chat.completions.create(
                     model=model,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
                 )
-            except Exception as cost_error:
-                logger.warning(f"Could not calculate cost for {model}: {cost_error}")
-                cost_usd = 0.0
-            
-            # Extract output
-            output = response.choices[0].message.content
+                return response.choices[0].message.content, response.usage, False
             
-            # Check for refusals
-            is_refusal = self._detect_refusal(output)
+            # Transient failures (429/5xx/timeouts) are retried with backoff
+            output, usage, aborted = retrying(call)
             
-            logger.info(f"Successfully called {model} via Portkey ({provider})")
+            latency_ms = (time.time() - start_time) * 1000
             
-            return ReplayResult(
-                prompt_id=prompt.id,
-                model=model,
-                provider=provider,
-                success=True,
-                output=output,
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                total_tokens=total_tokens,
-                cost_usd=cost_usd,
-                latency_ms=latency_ms,
-                is_refusal=is_refusal,
-                schema_valid=True
+            result = self._build_result(
+                prompt, model, provider, output, usage, latency_ms,
+                portkey_client.get_unit_prices(provider, model)
             )
+            result.retries = self._retry_count(retrying)
+            # A truncated refusal must not be served to later full-length replays
+            if not aborted:
+                self._store_cached(cache_key, prompt, result, temperature, max_tokens)
+            return result
             
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Error replaying with {model} via Portkey: {error_msg}", exc_info=True)
+            return self._build_error_result(prompt, model, provider, e, self._retry_count(retrying))
+    
+    async def replay_single_async(
+        self,
+        prompt: HistoricalPrompt,
+        model: str,
+        temperature: float = 0.0,
+        max_tokens: int = 1000,
+        early_abort_on_refusal: bool = False,
+        cache_prefix: bool = False
+    ) -> ReplayResult:
+        """Async twin of replay_single - awaits the network call so many replays can overlap"""
+        
+        provider = self.get_provider(model)
+        
+        cache_key = replay_cache_key(model, temperature, max_tokens, prompt.messages)
+        cached = self._get_cached(cache_key, prompt, model, temperature, max_tokens)
+        if cached:
+            return cached
+        
+        messages = (
+            self._with_cache_control(prompt.messages, self._static_prefix_len(prompt))
+            if cache_prefix else prompt.messages
+        )
+        retrying = AsyncRetrying(**self._retry_policy())
+        try:
+            start_time = time.time()
             
-            # Provide helpful error messages for Model Catalog
-            if "x-portkey-provider" in error_msg or "x-portkey-config" in error_msg:
-                error_msg += f"\n\n⚠️  Provider configuration required. Make sure {provider.upper()} API key is set in Portkey Model Catalog at https://app.portkey.ai/settings/api-keys"
-            elif "401" in error_msg or "authentication" in error_msg.lower():
-                error_msg += f"\n\n⚠️  Authentication failed. Add your {provider.upper()} API key at https://app.portkey.ai/settings/api-keys"
-            elif "not found" in error_msg.lower() or "404" in error_msg:
-                error_msg += f"\n\n⚠️  Model '{model}' not found. Check model name is correct."
+            portkey = self._get_async_client(provider)
+            semaphore, limiter, token_limiter = self._get_provider_limits(provider)
+            # aiolimiter can't grant more than its per-minute capacity in one acquire
+            estimated_tokens = min(self._estimate_tokens(prompt.messages, max_tokens), token_limiter.max_rate)
             
-            return ReplayResult(
-                prompt_id=prompt.id,
-                model=model,
-                provider=provider,
-                success=False,
-                error=error_msg,
-                is_refusal=False
+            # Each attempt takes its own slot, so backoff sleeps don't hold one
+            async def call():
+                async with semaphore, limiter:
+                    await token_limiter.acquire(estimated_tokens)
+                    if early_abort_on_refusal:
+                        return await self._stream_completion_async(
+                            portkey, model, messages, temperature, max_tokens
+                        )
+                    response = await portkey.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                    )
+                    return response.choices[0].message.content, response.usage, False
+            
+            # Transient failures (429/5xx/timeouts) are retried with backoff
+            output, usage, aborted = await retrying(call)
+            
+            latency_ms = (time.time() - start_time) * 1000
+            
+            unit_prices = await self._unit_prices_async(provider, model)
+            result = self._build_result(prompt, model, provider, output, usage, latency_ms, unit_prices)
+            result.retries = self._retry_count(retrying)
+            # A truncated refusal must not be served to later full-length replays
+            if not aborted:
+                self._store_cached(cache_key, prompt, result, temperature, max_tokens)
+            return result
+            
+        except Exception as e:
+            return self._build_error_result(prompt, model, provider, e, self._retry_count(retrying))
+    
+    def _static_prefix_len(self, prompt: HistoricalPrompt) -> int:
+        """
+        Number of leading messages that are identical across calls (system prompt,
+        tool definitions, few-shot examples). Callers can declare it explicitly via
+        metadata["static_prefix_messages"]; otherwise it's the leading system messages.
+        The last message is the per-call input and never part of the prefix.
+        """
+        messages = prompt.messages
+        declared = (prompt.metadata or {}).get("static_prefix_messages")
+        if isinstance(declared, int) and not isinstance(declared, bool):
+            prefix_len = declared
+        else:
+            prefix_len = 0
+            while prefix_len < len(messages) and messages[prefix_len].get("role") == "system":
+                prefix_len += 1
+        return max(0, min(prefix_len, len(messages) - 1))
+    
+    def _with_cache_control(self, messages: List[Dict], prefix_len: int) -> List[Dict]:
+        """Mark the end of the static prefix as an ephemeral prompt-cache breakpoint"""
+        if prefix_len <= 0 or not isinstance(messages[prefix_len - 1].get("content"), str):
+            return messages
+        last = messages[prefix_len - 1]
+        breakpoint_message = {
+            **last,
+            "content": [{
+                "type": "text",
+                "text": last["content"],
+                "cache_control": {"type": "ephemeral"},
+            }],
+        }
+        return [*messages[:prefix_len - 1], breakpoint_message, *messages[prefix_len:]]
+    
+    def _retry_policy(self) -> dict:
+        """Tenacity settings shared by the sync and async call paths"""
+        return {
+            "retry": lambda retry_state: (
+                retry_state.outcome.failed and _is_transient(retry_state.outcome.exception())
+            ),
+            "wait": _retry_wait,
+            "stop": stop_after_attempt(max(1, self.max_attempts)),
+            "before_sleep": lambda retry_state: logger.warning(
+                "Transient error (attempt %d), retrying: %s",
+                retry_state.attempt_number, retry_state.outcome.exception()
+            ),
+            "reraise": True,
+        }
+    
+    def _retry_count(self, retrying) -> int:
+        """Retries used by the last call made through a Retrying object"""
+        return max(0, retrying.statistics.get("attempt_number", 1) - 1)
+    
+    def _stream_completion(
+        self,
+        portkey: Portkey,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ):
+        """
+        Stream a completion, dropping the connection once the opening is a refusal
+        
+        Returns:
+            (output, usage, aborted) - usage of an aborted stream is estimated from
+            the chunks received, since providers only report it at the end
+        """
+        stream = portkey.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        parts, length, usage, checked = [], 0, None, False
+        try:
+            for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    length += len(parts[-1])
+                if not checked and length >= REFUSAL_WINDOW:
+                    checked = True
+                    if self._detect_refusal("".join(parts)):
+                        return "".join(parts), usage or self._partial_usage(messages, len(parts)), True
+        finally:
+            stream.close()
+        return "".join(parts), usage, False
+    
+    async def _stream_completion_async(
+        self,
+        portkey: AsyncPortkey,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ):
+        """Async twin of _stream_completion"""
+        stream = await portkey.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        parts, length, usage, checked = [], 0, None, False
+        try:
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    length += len(parts[-1])
+                if not checked and length >= REFUSAL_WINDOW:
+                    checked = True
+                    if self._detect_refusal("".join(parts)):
+                        return "".join(parts), usage or self._partial_usage(messages, len(parts)), True
+        finally:
+            await stream.close()
+        return "".join(parts), usage, False
+    
+    def _partial_usage(self, messages: List[Dict], completion_chunks: int) -> types.SimpleNamespace:
+        """Approximate usage of a stream cut short (one content chunk is about one token)"""
+        prompt_tokens = self._estimate_tokens(messages, 0)
+        return types.SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_chunks,
+            total_tokens=prompt_tokens + completion_chunks
+        )
+    
+    def _get_cached(
+        self,
+        cache_key: str,
+        prompt: HistoricalPrompt,
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Optional[ReplayResult]:
+        """Return a cached result for this prompt, if the call is deterministic and cached"""
+        # Sampled outputs differ per call, so only temperature=0 replays are cacheable
+        if temperature != 0.0:
+            return None
+        
+        cached = self._cache.get(cache_key)
+        if not cached and self._use_semantic_cache(prompt):
+            # Exact miss - fall back to the closest paraphrase of the same bucket
+            similar_key = self._semantic_cache.lookup(
+                self._semantic_bucket(model, temperature, max_tokens), self._prompt_text(prompt)
             )
+            if similar_key:
+                cached = self._cache.get(similar_key)
+        if not cached:
+            return None
+        
+        logger.debug("Replay cache hit for %s", cached['model'])
+        # Keep the original cost/latency so model metrics stay comparable; flag the hit
+        return ReplayResult(**{**cached, "prompt_id": prompt.id, "retries": 0, "cached": True})
+    
+    def _store_cached(
+        self,
+        cache_key: str,
+        prompt: HistoricalPrompt,
+        result: ReplayResult,
+        temperature: float,
+        max_tokens: int
+    ):
+        """Cache a successful deterministic result"""
+        if temperature != 0.0 or not result.success:
+            return
+        self._cache.set(cache_key, result.model_dump())
+        if self._use_semantic_cache(prompt):
+            self._semantic_cache.add(
+                self._semantic_bucket(result.model, temperature, max_tokens),
+                self._prompt_text(prompt),
+                cache_key
+            )
+    
+    def _use_semantic_cache(self, prompt: HistoricalPrompt) -> bool:
+        # Marshaled prompts are positional bundles; a "similar" bundle would map
+        # answers onto the wrong prompts
+        return self._semantic_cache is not None and not prompt.metadata.get("marshaled")
+    
+    def _semantic_bucket(self, model: str, temperature: float, max_tokens: int) -> str:
+        return f"{model}|{temperature}|{max_tokens}"
+    
+    def _prompt_text(self, prompt: HistoricalPrompt) -> str:
+        return "\n".join(f"{msg.get('role')}: {msg.get('content')}" for msg in prompt.messages)
+    
+    def _build_result(
+        self,
+        prompt: HistoricalPrompt,
+        model: str,
+        provider: str,
+        output: str,
+        usage,
+        latency_ms: float,
+        unit_prices: Tuple[float, float, float]
+    ) -> ReplayResult:
+        """Turn a chat completion's output and usage into a ReplayResult (unit_prices from get_unit_prices)"""
+        # Extract token usage
+        try:
+            prompt_tokens = usage.prompt_tokens
+            completion_tokens = usage.completion_tokens
+            total_tokens = usage.total_tokens
+        except AttributeError:
+            prompt_tokens = completion_tokens = total_tokens = 0
+        
+        # Prompt-cache hits (OpenAI reports them under prompt_tokens_details) are part
+        # of prompt_tokens but billed at the cheaper cache-read price
+        cached_tokens = getattr(usage, 'cache_read_input_tokens', None)
+        if cached_tokens is None:
+            cached_tokens = getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', 0)
+        cached_tokens = min(cached_tokens or 0, prompt_tokens)
+        cache_write_tokens = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+        
+        # Prices are resolved by the caller, so costing is local arithmetic
+        input_price, output_price, cache_price = unit_prices
+        if not cache_price:
+            cache_price = input_price * CACHE_READ_PRICE_RATIO
+        cost_usd = (
+            (prompt_tokens - cached_tokens) * input_price
+            + cached_tokens * cache_price
+            + cache_write_tokens * input_price * CACHE_WRITE_PREMIUM
+            + completion_tokens * output_price
+        )
+        
+        # Check for refusals
+        is_refusal = self._detect_refusal(output)
+        
+        logger.debug("Successfully called %s via Portkey (%s)", model, provider)
+        
+        return ReplayResult(
+            prompt_id=prompt.id,
+            model=model,
+            provider=provider,
+            success=True,
+            output=output,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            cached_prompt_tokens=cached_tokens,
+            cost_usd=cost_usd,
+            latency_ms=latency_ms,
+            is_refusal=is_refusal,
+            schema_valid=True
+        )
+    
+    async def _unit_prices_async(self, provider: str, model: str) -> Tuple[float, float, float]:
+        """Unit prices without blocking the event loop (a price miss is fetched on a thread)"""
+        prices = portkey_client.cached_unit_prices(provider, model)
+        if prices is None:
+            prices = await asyncio.to_thread(portkey_client.get_unit_prices, provider, model)
+        return prices
+    
+    def _build_error_result(
+        self,
+        prompt: HistoricalPrompt,
+        model: str,
+        provider: str,
+        error: Exception,
+        retries: int = 0
+    ) -> ReplayResult:
+        """Turn a failed call into a ReplayResult with a helpful error message"""
+        error_msg = str(error)
+        logger.error("Error replaying with %s via Portkey: %s", model, error_msg, exc_info=error)
+        
+        # Provide helpful error messages for Model Catalog
+        if "x-portkey-provider" in error_msg or "x-portkey-config" in error_msg:
+            error_msg += f"\n\n⚠️  Provider configuration required. Make sure {provider.upper()} API key is set in Portkey Model Catalog at https://app.portkey.ai/settings/api-keys"
+        elif "401" in error_msg or "authentication" in error_msg.lower():
+            error_msg += f"\n\n⚠️  Authentication failed. Add your {provider.upper()} API key at https://app.portkey.ai/settings/api-keys"
+        elif "not found" in error_msg.lower() or "404" in error_msg:
+            error_msg += f"\n\n⚠️  Model '{model}' not found. Check model name is correct."
+        
+        return ReplayResult(
+            prompt_id=prompt.id,
+            model=model,
+            provider=provider,
+            success=False,
+            error=error_msg,
+            is_refusal=False,
+            retries=retries
+        )
     
     def replay_batch(
         self,
@@ -162,11 +737,71 @@ class ReplayEngine:
         temperature: float = 0.0,
         max_tokens: int = 1000,
         use_validation: bool = True,
-        validation_phase: str = "discovery"
+        validation_phase: str = "discovery",
+        max_concurrency: int = 32,
+        use_marshaling: Optional[bool] = None,
+        early_abort_on_refusal: bool = False,
+        validator_workers: int = 8,
+        on_progress: Optional[Callable[[int, int, ReplayResult], None]] = None,
+        run_id: Optional[str] = None
+    ) -> List[ReplayResult]:
+        """
+        Synchronous wrapper around replay_batch_async for callers that can't await
+        
+        See replay_batch_async for arguments.
+        """
+        batch = self.replay_batch_async(
+            prompts=prompts,
+            models=models,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_validation=use_validation,
+            validation_phase=validation_phase,
+            max_concurrency=max_concurrency,
+            use_marshaling=use_marshaling,
+            early_abort_on_refusal=early_abort_on_refusal,
+            validator_workers=validator_workers,
+            on_progress=on_progress,
+            run_id=run_id
+        )
+        
+        async def run_batch() -> List[ReplayResult]:
+            try:
+                return await batch
+            finally:
+                # The loop ends with the batch, so close its connection pool instead of leaking it
+                await close_async_http_client()
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(run_batch())
+        
+        # Already inside an event loop (e.g. async test scripts): run on a worker thread
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, run_batch()).result()
+    
+    async def replay_batch_async(
+        self,
+        prompts: List[HistoricalPrompt],
+        models: List[str],
+        temperature: float = 0.0,
+        max_tokens: int = 1000,
+        use_validation: bool = True,
+        validation_phase: str = "discovery",
+        max_concurrency: int = 32,
+        use_marshaling: Optional[bool] = None,
+        early_abort_on_refusal: bool = False,
+        validator_workers: int = 8,
+        on_progress: Optional[Callable[[int, int, ReplayResult], None]] = None,
+        run_id: Optional[str] = None
     ) -> List[ReplayResult]:
         """
         Replay multiple prompts across multiple models via Portkey with automatic validation
         
+        All prompt x model calls are dispatched concurrently, so wall time is roughly
+        the slowest call instead of the sum of all calls.
+        
         Args:
             prompts: List of prompts to replay
             models: Models to test
@@ -174,6 +809,20 @@ class ReplayEngine:
             max_tokens: Max completion tokens
             use_validation: Enable hybrid validation (default: True)
             validation_phase: "discovery" or "production" (affects validation strategy)
+            max_concurrency: Maximum number of in-flight model calls
+            use_marshaling: Pack several prompts into one call per model
+                (None = auto-enable for many short prompts sharing a system message)
+            early_abort_on_refusal: Stream single replays and stop reading once the
+                opening is a refusal (marshaled calls always run to completion)
+            validator_workers: Number of workers validating finished replays while
+                the remaining calls are still in flight
+            on_progress: Called as on_progress(completed, total, result) each time a
+                unique replay finishes (after validation), instead of per-call logging
+            run_id: Checkpoint successful replays under this id; rerunning the same
+                batch with the same run_id after a crash skips them
+        
+        Returns:
+            Results in prompt-major order (same order as the nested prompts x models loop)
         """
         # Import validator ONCE at the start
         hybrid_validator = None
@@ -187,7 +836,6 @@ class ReplayEngine:
                 logger.error(f"   Make sure backend/validator/hybrid_validator.py exists")
                 use_validation = False
         
-        results = []
         total_calls = len(prompts) * len(models)
         
         logger.info(f"Starting replay via Portkey Model Catalog: {len(prompts)} prompts x {len(models)} models = {total_calls} calls")
@@ -196,93 +844,533 @@ class ReplayEngine:
         else:
             logger.warning(f"⚠️  Validation DISABLED")
         
-        for i, prompt in enumerate(prompts):
-            for model in models:
-                logger.info(f"Replaying prompt {i+1}/{len(prompts)} with {model}")
-                
-                result = self.replay_single(
-                    prompt=prompt,
-                    model=model,
-                    temperature=temperature,
-                    max_tokens=max_tokens
+        # Identical (model, messages) pairs only need one call; every duplicate slot
+        # points at the index of its first occurrence. Sampled replays are left
+        # alone so repeated prompts still yield independent outputs.
+        if temperature == 0:
+            first_seen = {}
+            representative = [
+                first_seen.setdefault(orjson.dumps(prompt.messages, option=orjson.OPT_SORT_KEYS), i)
+                for i, prompt in enumerate(prompts)
+            ]
+        else:
+            representative = list(range(len(prompts)))
+        unique_indices = list(dict.fromkeys(representative))
+        unique_models = list(dict.fromkeys(models))
+        unique_calls = len(unique_indices) * len(unique_models)
+        if total_calls and unique_calls < total_calls:
+            logger.info(
+                f"Deduplicated {total_calls} replays to {unique_calls} unique calls "
+                f"(dedupe_ratio={1 - unique_calls / total_calls:.2f})"
+            )
+        
+        unique_prompts = [prompts[i] for i in unique_indices]
+        if use_marshaling is None:
+            use_marshaling = self._should_marshal(unique_prompts, max_tokens)
+        elif use_marshaling and not self._can_marshal(unique_prompts):
+            logger.warning("Marshaling needs single-turn prompts sharing one system message, replaying individually")
+            use_marshaling = False
+        
+        # Work units: (prompt indices, model) - one index per unit unless marshaled
+        if use_marshaling:
+            size = self.marshal_batch_size
+            units = [
+                (unique_indices[start:start + size], model)
+                for model in unique_models
+                for start in range(0, len(unique_indices), size)
+            ]
+            logger.info(f"Row-marshaling enabled: {unique_calls} replays packed into {len(units)} calls")
+        else:
+            units = [([i], model) for i in unique_indices for model in unique_models]
+        
+        # Static prefixes (system prompt, tools, few-shot examples) shared by several
+        # replays are worth a prompt-cache write on Anthropic (OpenAI caches long
+        # prefixes automatically)
+        def static_prefix(prompt: HistoricalPrompt) -> Optional[bytes]:
+            prefix = prompt.messages[:self._static_prefix_len(prompt)]
+            if not prefix or not all(isinstance(m.get("content"), str) for m in prefix):
+                return None
+            if sum(len(m["content"]) for m in prefix) < self.prompt_cache_min_chars:
+                return None
+            return orjson.dumps(prefix, option=orjson.OPT_SORT_KEYS)
+        
+        prefix_counts = collections.Counter(
+            prefix for prefix in map(static_prefix, unique_prompts) if prefix is not None
+        )
+        shared_prefixes = {prefix for prefix, count in prefix_counts.items() if count > 1}
+        
+        def use_prompt_cache(prompt: HistoricalPrompt, model: str) -> bool:
+            return (
+                bool(shared_prefixes)
+                and self._provider_family(self.get_provider(model)) == "anthropic"
+                and static_prefix(prompt) in shared_prefixes
+            )
+        
+        # Interleave providers so a backlog on one provider's rate limit doesn't
+        # hold every batch-wide slot while other providers sit idle
+        by_family = {}
+        for unit in units:
+            by_family.setdefault(self._provider_family(self.get_provider(unit[1])), []).append(unit)
+        units = [unit for group in itertools.zip_longest(*by_family.values()) for unit in group if unit]
+        
+        # Look up each model's prices once, off the loop, before any call needs them
+        await asyncio.gather(*(self._unit_prices_async(self.get_provider(model), model) for model in unique_models))
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        validation_queue = asyncio.Queue()
+        
+        completed = 0
+        checkpoint = ReplayCheckpoint(run_id) if run_id else None
+        
+        def checkpoint_key(i: int, model: str) -> str:
+            return f"{i}:{replay_cache_key(model, temperature, max_tokens, prompts[i].messages)}"
+        
+        def finish(i: int, result: ReplayResult, resumed: bool = False):
+            nonlocal completed
+            completed += 1
+            if checkpoint and result.success and not resumed:
+                checkpoint.put(checkpoint_key(i, result.model), result)
+            if not result.success:
+                logger.error("✗ Failed: %s - %s", result.model, result.error)
+            elif logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "✓ Success: %s - %d tokens, $%.6f, validation=%s",
+                    result.model, result.total_tokens, result.cost_usd, result.validation_score
                 )
-                
+            if on_progress:
+                try:
+                    on_progress(completed, unique_calls, result)
+                except Exception as e:
+                    logger.warning("on_progress callback failed: %s", e)
+        
+        async def validator_worker():
+            # Drains finished replays so validation overlaps with calls still in flight
+            while True:
+                i, result = await validation_queue.get()
+                try:
+                    await self._validate_result(hybrid_validator, prompts[i], result, validation_phase)
+                except Exception as e:
+                    # Unvalidated, it's still a successful replay: count and checkpoint it below
+                    logger.error("Validation failed for %s: %s", result.model, e, exc_info=True)
+                try:
+                    finish(i, result)
+                except Exception as e:
+                    # A dead worker would leave validation_queue.join() waiting forever
+                    logger.error("Validator worker failed to finish %s: %s", result.model, e, exc_info=True)
+                finally:
+                    validation_queue.task_done()
+        
+        async def run_unit(indices: List[int], model: str) -> List[ReplayResult]:
+            # Resuming a crashed run: skip units whose replays all finished last time
+            if checkpoint:
+                resumed = [checkpoint.get(checkpoint_key(i, model)) for i in indices]
+                if all(resumed):
+                    for i, result in zip(indices, resumed):
+                        result.prompt_id = prompts[i].id
+                        finish(i, result, resumed=True)
+                    return resumed
+            
+            async with semaphore:
+                if len(indices) == 1:
+                    logger.debug("Replaying prompt %d/%d with %s", indices[0] + 1, len(prompts), model)
+                    unit_results = [await self.replay_single_async(
+                        prompt=prompts[indices[0]],
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        early_abort_on_refusal=early_abort_on_refusal,
+                        cache_prefix=use_prompt_cache(prompts[indices[0]], model)
+                    )]
+                else:
+                    logger.debug(
+                        "Replaying prompts %d-%d/%d with %s (marshaled)",
+                        indices[0] + 1, indices[-1] + 1, len(prompts), model
+                    )
+                    unit_results = await self.replay_marshaled_async(
+                        [prompts[i] for i in indices], model, temperature, max_tokens,
+                        cache_prefix=use_prompt_cache(prompts[indices[0]], model)
+                    )
+            
+            for i, result in zip(indices, unit_results):
                 # Validate output if enabled and successful
                 if use_validation and hybrid_validator and result.success and result.output:
-                    try:
-                        logger.info(f"  🔍 Starting validation for {model}...")
-                        
-                        # Call validator (it's synchronous, not async)
-                        validation = hybrid_validator.validate(
-                            prompt=prompt,
-                            output=result.output,
-                            model=model,
-                            phase=validation_phase
-                        )
-                        
-                        # Add validation results
-                        result.validation_score = validation.score
-                        result.validation_method = validation.method
-                        result.validation_confidence = validation.confidence
-                        
-                        logger.info(
-                            f"  ✅ Validated: {validation.score:.1f}/100 "
-                            f"({validation.method}, {validation.confidence})"
-                        )
-                        logger.info(f"  💾 Validation result stored in database")
-                    except Exception as e:
-                        logger.error(f"  ❌ Validation failed for {model}: {e}", exc_info=True)
-                
-                results.append(result)
-                
-                # Log result status
-                if result.success:
-                    validation_info = f", validation={result.validation_score:.1f}" if result.validation_score else ""
-                    logger.info(f"✓ Success: {model} - {result.total_tokens} tokens, ${result.cost_usd:.6f}{validation_info}")
+                    validation_queue.put_nowait((i, result))
                 else:
-                    logger.error(f"✗ Failed: {model} - {result.error}")
+                    finish(i, result)
+            return unit_results
         
-        # Summary statistics
-        successful = sum(1 for r in results if r.success)
-        failed = sum(1 for r in results if not r.success)
-        validated = sum(1 for r in results if r.validation_score is not None)
-        total_cost = sum(r.cost_usd for r in results if r.success)
+        workers = [
+            asyncio.create_task(validator_worker())
+            for _ in range(max(1, validator_workers) if use_validation else 0)
+        ]
+        if use_validation:
+            # Store validation rows in bulk rather than one Supabase round-trip each
+            hybrid_validator.begin_buffered_storage()
+        try:
+            outcomes = await asyncio.gather(
+                *(run_unit(indices, model) for indices, model in units),
+                return_exceptions=True
+            )
+            await validation_queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            if use_validation:
+                await asyncio.to_thread(hybrid_validator.end_buffered_storage)
+            if checkpoint:
+                checkpoint.close()
+        
+        by_slot = {}
+        for (indices, model), outcome in zip(units, outcomes):
+            for n, i in enumerate(indices):
+                if isinstance(outcome, BaseException):
+                    by_slot[i, model] = self._build_error_result(prompts[i], model, self.get_provider(model), outcome)
+                else:
+                    by_slot[i, model] = outcome[n]
+        
+        # Fan results back out; duplicate slots get their own copy with their own prompt id
+        results = []
+        emitted = set()
+        for i in range(len(prompts)):
+            for model in models:
+                slot = (representative[i], model)
+                result = by_slot[slot]
+                if slot in emitted:
+                    result = result.model_copy(update={"prompt_id": prompts[i].id})
+                emitted.add(slot)
+                results.append(result)
+        
+        # Summary statistics (single pass)
+        successful = validated = retries = 0
+        total_cost = 0.0
+        for r in results:
+            if r.success:
+                successful += 1
+                total_cost += r.cost_usd
+            if r.validation_score is not None:
+                validated += 1
+            retries += r.retries
+        failed = len(results) - successful
         
         logger.info(f"Replay complete: {successful} successful, {failed} failed, ${total_cost:.6f} total cost")
-        logger.info(f"Validation: {validated}/{len(results)} results validated ({validated/len(results)*100:.1f}%)")
+        if results:
+            logger.info(f"Retries: {retries} total ({retries/len(results):.2f} per call)")
+            logger.info(f"Validation: {validated}/{len(results)} results validated ({validated/len(results)*100:.1f}%)")
         
         return results
     
-    def _detect_refusal(self, output: str) -> bool:
-        """Detect if model refused to answer"""
-        if not output:
-            return False
+    async def replay_batch_bulk_async(
+        self,
+        prompts: List[HistoricalPrompt],
+        models: List[str],
+        temperature: float = 0.0,
+        max_tokens: int = 1000,
+        use_validation: bool = True,
+        validation_phase: str = "discovery",
+        poll_interval: float = 30.0
+    ) -> List[ReplayResult]:
+        """
+        Replay prompts through each provider's Batch API (via Portkey) instead of
+        real-time calls. Jobs can take up to 24h but are billed at half price, so
+        this is for offline cost analysis rather than interactive use.
+        
+        Returns:
+            Results in prompt-major order, like replay_batch_async
+        """
+        logger.info(f"Starting Batch API replay: {len(prompts)} prompts x {len(models)} models")
+        
+        outcomes = await asyncio.gather(
+            *(self._run_provider_batch(prompts, model, temperature, max_tokens, poll_interval) for model in models),
+            return_exceptions=True
+        )
+        by_model = {}
+        for model, outcome in zip(models, outcomes):
+            if isinstance(outcome, BaseException):
+                provider = self.get_provider(model)
+                outcome = [self._build_error_result(prompt, model, provider, outcome) for prompt in prompts]
+            by_model[model] = outcome
+        results = [by_model[model][i] for i in range(len(prompts)) for model in models]
+        
+        if use_validation:
+            from backend.validator.hybrid_validator import hybrid_validator
+            hybrid_validator.begin_buffered_storage()
+            try:
+                await asyncio.gather(*(
+                    self._validate_result(hybrid_validator, prompts[n // len(models)], result, validation_phase)
+                    for n, result in enumerate(results) if result.success and result.output
+                ))
+            finally:
+                await asyncio.to_thread(hybrid_validator.end_buffered_storage)
+        
+        successful = sum(r.success for r in results)
+        total_cost = sum(r.cost_usd for r in results if r.success)
+        logger.info(f"Batch API replay complete: {successful} successful, {len(results) - successful} failed, ${total_cost:.6f} total cost")
+        return results
+    
+    async def _run_provider_batch(
+        self,
+        prompts: List[HistoricalPrompt],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        poll_interval: float
+    ) -> List[ReplayResult]:
+        """Submit one model's replays as a Batch API job, wait for it and parse the output file"""
+        provider = self.get_provider(model)
+        portkey = self._get_async_client(provider)
+        
+        requests_jsonl = "\n".join(
+            json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": prompt.messages,
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                },
+            })
+            for i, prompt in enumerate(prompts)
+        )
+        start_time = time.time()
+        input_file = await portkey.files.create(
+            file=("replay_batch.jsonl", requests_jsonl.encode()), purpose="batch"
+        )
+        batch = await portkey.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted batch {batch.id} for {model}: {len(prompts)} requests")
+        
+        deadline = time.monotonic() + BATCH_MAX_WAIT_SECONDS
+        try:
+            while batch.status not in BATCH_TERMINAL_STATUSES:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(
+                        f"Batch {batch.id} for {model} still '{batch.status}' after {BATCH_MAX_WAIT_SECONDS / 3600:.0f}h"
+                    )
+                await asyncio.sleep(poll_interval)
+                batch = await portkey.batches.retrieve(batch.id)
+        except (asyncio.CancelledError, TimeoutError):
+            # Don't leave a paid job running that nobody will collect
+            await self._cancel_provider_batch(portkey, batch.id)
+            raise
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} for {model} ended with status '{batch.status}'")
+        
+        # Per-request latency isn't observable; report the job's wall time
+        latency_ms = (time.time() - start_time) * 1000
+        content = await portkey.files.content(batch.output_file_id)
+        unit_prices = await self._unit_prices_async(provider, model)
         
-        refusal_phrases = [
-            "i cannot",
-            "i can't",
-            "i'm not able to",
-            "i am not able to",
-            "i don't have access",
-            "i cannot provide",
-            "i cannot assist",
-            "i'm sorry, but i cannot",
-            "against my programming",
-            "violates my guidelines",
-            "i'm not allowed to",
-            "i must decline",
-            "i won't be able to",
-            "i'm unable to"
+        results: List[Optional[ReplayResult]] = [None] * len(prompts)
+        for line in filter(None, content.text.splitlines()):
+            # Namespaces let _build_result read usage the same way as SDK responses
+            row = json.loads(line, object_hook=lambda d: types.SimpleNamespace(**d))
+            i = int(row.custom_id)
+            response = getattr(row, "response", None)
+            if response is None or response.status_code != 200:
+                error = getattr(row, "error", None) or getattr(getattr(response, "body", None), "error", None)
+                results[i] = self._build_error_result(
+                    prompts[i], model, provider,
+                    RuntimeError(f"Batch request failed: {getattr(error, 'message', error)}")
+                )
+                continue
+            result = self._build_result(
+                prompts[i], model, provider,
+                response.body.choices[0].message.content, response.body.usage, latency_ms, unit_prices
+            )
+            result.cost_usd *= BATCH_API_DISCOUNT
+            results[i] = result
+        
+        return [
+            result or self._build_error_result(
+                prompts[i], model, provider, RuntimeError(f"Batch {batch.id} returned no output for this request")
+            )
+            for i, result in enumerate(results)
         ]
+    
+    async def _cancel_provider_batch(self, portkey: AsyncPortkey, batch_id: str):
+        """Best-effort cancel of an abandoned Batch API job"""
+        try:
+            # Shielded so a second cancellation can't abort the cancel request itself
+            await asyncio.shield(portkey.batches.cancel(batch_id))
+            logger.warning(f"Cancelled abandoned batch {batch_id}")
+        except Exception as e:
+            logger.error(f"Failed to cancel batch {batch_id}: {e}")
+    
+    def replay_marshaled(
+        self,
+        prompts: List[HistoricalPrompt],
+        model: str,
+        temperature: float = 0.0,
+        max_tokens: int = 256,
+        batch_size: int = 8
+    ) -> List[ReplayResult]:
+        """
+        Replay prompts by packing batch_size of them into each call (row-marshaling)
+        
+        Amortizes per-request overhead and per-provider RPM limits across many short
+        prompts. Chunks whose reply can't be split back apart are replayed individually.
+        
+        Args:
+            max_tokens: Max completion tokens per prompt (scaled by chunk size per call)
+        """
+        results = []
+        for start in range(0, len(prompts), batch_size):
+            chunk = prompts[start:start + batch_size]
+            combined = self.replay_single(
+                self._marshal_prompt(chunk), model, temperature, max_tokens * len(chunk)
+            )
+            chunk_results = self._unmarshal(chunk, combined)
+            if chunk_results is None:
+                chunk_results = [self.replay_single(p, model, temperature, max_tokens) for p in chunk]
+            results.extend(chunk_results)
+        return results
+    
+    async def replay_marshaled_async(
+        self,
+        prompts: List[HistoricalPrompt],
+        model: str,
+        temperature: float = 0.0,
+        max_tokens: int = 256,
+        cache_prefix: bool = False
+    ) -> List[ReplayResult]:
+        """Async twin of replay_marshaled for a single chunk of prompts"""
+        combined = await self.replay_single_async(
+            self._marshal_prompt(prompts), model, temperature, max_tokens * len(prompts),
+            cache_prefix=cache_prefix
+        )
+        results = self._unmarshal(prompts, combined)
+        if results is None:
+            results = list(await asyncio.gather(
+                *(
+                    self.replay_single_async(p, model, temperature, max_tokens, cache_prefix=cache_prefix)
+                    for p in prompts
+                )
+            ))
+        return results
+    
+    def _can_marshal(self, prompts: List[HistoricalPrompt]) -> bool:
+        """Prompts can be marshaled if each is one user turn behind the same optional system message"""
+        systems = set()
+        for prompt in prompts:
+            roles = [msg.get("role") for msg in prompt.messages]
+            if roles == ["system", "user"]:
+                systems.add(prompt.messages[0].get("content"))
+            elif roles == ["user"]:
+                systems.add(None)
+            else:
+                return False
+        return len(systems) == 1
+    
+    def _should_marshal(self, prompts: List[HistoricalPrompt], max_tokens: int) -> bool:
+        """Auto-enable marshaling for many short-answer prompts sharing a system message"""
+        return (
+            len(prompts) > self.marshal_threshold
+            and max_tokens <= self.marshal_max_tokens
+            and self._can_marshal(prompts)
+            and prompts[0].messages[0].get("role") == "system"
+        )
+    
+    def _marshal_prompt(self, prompts: List[HistoricalPrompt]) -> HistoricalPrompt:
+        """Pack prompts into a single numbered-list prompt"""
+        messages = [msg for msg in prompts[0].messages[:-1]]  # shared system message, if any
+        numbered = "\n".join(
+            f"{n}. {prompt.messages[-1].get('content', '')}" for n, prompt in enumerate(prompts, 1)
+        )
+        messages.append({"role": "user", "content": f"{MARSHAL_INSTRUCTIONS}\n\n{numbered}"})
+        return HistoricalPrompt(messages=messages, metadata={"marshaled": len(prompts)})
+    
+    def _unmarshal(
+        self,
+        prompts: List[HistoricalPrompt],
+        combined: ReplayResult
+    ) -> Optional[List[ReplayResult]]:
+        """
+        Split a marshaled reply back into one result per prompt
         
-        output_lower = output.lower()
-        check_text = output_lower[:200]
+        Tokens and cost are apportioned by answer length. Returns None if the
+        reply isn't a JSON object with an answer for every prompt number.
+        """
+        if not combined.success:
+            return [combined.model_copy(update={"prompt_id": p.id}) for p in prompts]
         
-        for phrase in refusal_phrases:
-            if phrase in check_text:
-                return True
+        try:
+            text = combined.output or ""
+            data = json.loads(text[text.index("{"):text.rindex("}") + 1])
+            answers = [str(data[str(n)]) for n in range(1, len(prompts) + 1)]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not split marshaled reply from {combined.model}: {e}")
+            return None
         
-        return False
+        total_chars = sum(len(a) for a in answers) or 1
+        results = []
+        for prompt, answer in zip(prompts, answers):
+            prompt_tokens = round(combined.prompt_tokens / len(prompts))
+            completion_tokens = round(combined.completion_tokens * len(answer) / total_chars)
+            total_tokens = prompt_tokens + completion_tokens
+            results.append(ReplayResult(
+                prompt_id=prompt.id,
+                model=combined.model,
+                provider=combined.provider,
+                success=True,
+                output=answer,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=total_tokens,
+                cached_prompt_tokens=round(combined.cached_prompt_tokens / len(prompts)),
+                cost_usd=combined.cost_usd * total_tokens / (combined.total_tokens or 1),
+                latency_ms=combined.latency_ms,
+                is_refusal=self._detect_refusal(answer),
+                schema_valid=True
+            ))
+        return results
+    
+    async def _validate_result(
+        self,
+        hybrid_validator,
+        prompt: HistoricalPrompt,
+        result: ReplayResult,
+        validation_phase: str
+    ):
+        """Run hybrid validation for a successful result and attach the scores"""
+        model = result.model
+        try:
+            logger.debug("  🔍 Starting validation for %s...", model)
+            
+            # Judge calls run on this loop; blocking DB/heuristic steps go to threads
+            validation = await hybrid_validator.validate_async(
+                prompt=prompt,
+                output=result.output,
+                model=model,
+                phase=validation_phase
+            )
+            
+            # Add validation results
+            result.validation_score = validation.score
+            result.validation_method = validation.method
+            result.validation_confidence = validation.confidence
+            
+            logger.debug(
+                "  ✅ Validated: %.1f/100 (%s, %s)",
+                validation.score, validation.method, validation.confidence
+            )
+        except Exception as e:
+            logger.error("  ❌ Validation failed for %s: %s", model, e, exc_info=True)
+    
+    def _detect_refusal(self, output: str) -> bool:
+        """Detect if model refused to answer"""
+        if not output:
+            return False
+        
+        # Refusals show up at the start of a response; only lowercase what we scan
+        head = output[:REFUSAL_WINDOW].lower()
+        if not any(marker in head for marker in _REFUSAL_MARKERS):
+            return False
+        return _REFUSAL_RE.search(head) is not None
 
 
 # Singleton instance
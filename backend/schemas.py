@@ -1,11 +1,12 @@
 from pydantic import BaseModel, Field, field_serializer
 from typing import List, Dict, Optional, Any
 from datetime import datetime
+import uuid
 
 
 class HistoricalPrompt(BaseModel):
     """A single historical LLM call to replay"""
-    id: str = Field(default_factory=lambda: str(datetime.now().timestamp()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     messages: List[Dict[str, str]] = Field(description="Chat messages in OpenAI format")
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
     original_model: Optional[str] = None
@@ -36,6 +37,7 @@ class ReplayResult(BaseModel):
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
+    cached_prompt_tokens: int = 0  # Prompt tokens served from the provider's prompt cache
     cost_usd: float = 0.0
     
     @field_serializer('cost_usd')
@@ -45,6 +47,8 @@ class ReplayResult(BaseModel):
     
     # Performance metrics
     latency_ms: float = 0.0
+    retries: int = 0  # Transient-error retries before the final attempt
+    cached: bool = False  # Served from the replay response cache (no provider call)
     
     # Quality indicators
     is_refusal: bool = False
@@ -117,6 +121,18 @@ class ReplayRequest(BaseModel):
     )
     temperature: float = Field(default=0.0, ge=0.0, le=2.0)
     max_tokens: int = Field(default=1000, gt=0, le=4096)
+    max_concurrency: int = Field(
+        default=32, ge=1, le=256,
+        description="Maximum replay calls in flight at once (per-provider limits still apply)"
+    )
+    early_abort_on_refusal: bool = Field(
+        default=False,
+        description="Stream responses and stop generating once the opening is a refusal"
+    )
+    use_batch: bool = Field(
+        default=False,
+        description="Replay through provider Batch APIs: half price, but may take up to 24h"
+    )
 
 
 class AnalysisReport(BaseModel):
@@ -2,10 +2,12 @@
 Test script to verify the backend is working
 """
 
-import json
+import asyncio
 import sys
 from pathlib import Path
 
+import orjson
+
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -15,14 +17,14 @@ from quality_scorer import quality_scorer
 from recommender import recommendation_engine
 
 
-def test_basic_replay():
+async def test_basic_replay():
     """Test basic replay functionality"""
     
     print("🧪 Testing Cost-Quality Optimization System\n")
     
     # Load demo prompts
-    with open("../data/demo_prompts.json", "r") as f:
-        prompts_data = json.load(f)
+    with open("../data/demo_prompts.json", "rb") as f:
+        prompts_data = orjson.loads(f.read())
     
     # Take first 2 prompts for quick test
     prompts = [HistoricalPrompt(**p) for p in prompts_data[:2]]
@@ -33,8 +35,8 @@ def test_basic_replay():
     print(f"📝 Replaying {len(prompts)} prompts across {len(models)} models...")
     print(f"Models: {', '.join(models)}\n")
     
-    # Run replay
-    results = replay_engine.replay_batch(
+    # Run replay (all prompt x model calls are in flight at once)
+    results = await replay_engine.replay_batch_async(
         prompts=prompts,
         models=models,
         temperature=0.0,
@@ -87,8 +89,10 @@ def test_basic_replay():
 
 
 if __name__ == "__main__":
+    # Block-buffer stdout so the report is flushed in a few writes, not one per line
+    sys.stdout.reconfigure(line_buffering=False, write_through=False)
     try:
-        test_basic_replay()
+        asyncio.run(test_basic_replay())
     except Exception as e:
         print(f"❌ Error: {e}")
         import traceback
@@ -3,8 +3,10 @@ Smart Cache Strategy - 4-Level Lookup
 Maximizes cache hits through intelligent fallback hierarchy
 """
 
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
 # Line 8 - fix import path
 from backend.classifier.model_families import get_model_family, get_family_models, get_transfer_confidence
 
@@ -21,11 +23,30 @@ class CacheResult:
     adjustment: float = 0.0  # Score adjustment for confidence
 
 
+@dataclass
+class Candidates:
+    """Candidate DB rows as parallel arrays, so each level is one mask over them"""
+    models: np.ndarray  # str
+    scores: np.ndarray  # float32 validation scores
+    similarities: np.ndarray  # float32 similarity to the looked-up prompt
+    exact: np.ndarray  # bool, same prompt text and same output
+
+
+@lru_cache(maxsize=256)
+def _family_profile(model: str) -> Tuple[str, np.ndarray]:
+    """Model's family and its other family members, resolved once per model name"""
+    family = get_model_family(model)
+    family_models = np.array([m for m in get_family_models(family) if m != model], dtype=str)
+    # Shared between lookups, so keep it read-only
+    family_models.flags.writeable = False
+    return family, family_models
+
+
 class SmartCacheStrategy:
     """
     4-level cache lookup strategy to maximize hits:
     
-    Level 1: Exact Match (prompt + model + scenario)
+    Level 1: Exact Match (prompt + output + model + scenario)
     Level 2: Similar Prompt (same model + scenario)
     Level 3: Model Family (similar prompt + family + scenario)
     Level 4: Scenario Baseline (any model in scenario)
@@ -39,33 +60,52 @@ class SmartCacheStrategy:
         prompt: str, 
         model: str, 
         scenario: str,
-        min_confidence: str = "MEDIUM"
+        min_confidence: str = "MEDIUM",
+        candidate_rows: Optional[List[Dict]] = None,
+        output: Optional[str] = None
     ) -> Optional[CacheResult]:
         """
         Perform 4-level cache lookup
         
+        Candidates for levels 1-3 (this model and its family, in this scenario) come
+        from a single DB query and are classified locally by prompt similarity.
+        
         Args:
             prompt: User prompt text
             model: Target model name
             scenario: Classified scenario
             min_confidence: Minimum confidence to accept (HIGH, MEDIUM, LOW)
+            candidate_rows: Rows from fetch_candidates(model, scenario), when the
+                caller already fetched them for a batch of prompts
+            output: Model output being validated (exact matches need the same output)
             
         Returns:
             CacheResult or None if no acceptable cache hit
         """
+        # Level 1 fast path: outputs this process already stored need no DB query
+        if output is not None:
+            result = self._known_exact_match(prompt, model, scenario, output)
+            if result:
+                return result
+        
+        family, family_models = _family_profile(model)
+        
+        if candidate_rows is None:
+            candidate_rows = self.fetch_candidates(model, scenario)
+        candidates = self._score_candidates(prompt, candidate_rows, output)
         
         # Level 1: Exact match
-        result = self._exact_match(prompt, model, scenario)
+        result = self._exact_match(candidates, model)
         if result and self._meets_min_confidence(result.confidence, min_confidence):
             return result
         
         # Level 2: Similar prompt, same model, same scenario
-        result = self._scenario_similar(prompt, model, scenario)
+        result = self._scenario_similar(candidates, model)
         if result and self._meets_min_confidence(result.confidence, min_confidence):
             return result
         
         # Level 3: Model family match
-        result = self._model_family_match(prompt, model, scenario)
+        result = self._model_family_match(candidates, family, family_models)
         if result and self._meets_min_confidence(result.confidence, min_confidence):
             return result
         
@@ -77,110 +117,128 @@ class SmartCacheStrategy:
         
         return None
     
+    def fetch_candidates(self, model: str, scenario: str) -> List[Dict]:
+        """DB rows for a model and its family in a scenario (shareable across prompts)"""
+        _, family_models = _family_profile(model)
+        return self.db.find_candidates(models=[model, *family_models.tolist()], scenario=scenario)
+    
+    def _score_candidates(self, prompt: str, rows: List[Dict], output: Optional[str] = None) -> Candidates:
+        """Score every candidate row's similarity to the prompt (word-set Jaccard)"""
+        prompt_words = set(prompt.lower().split())
+        rows = [row for row in rows if row.get("validation_score") is not None]
+        similarities = []
+        exact = []
+        for row in rows:
+            text = row.get("input") or ""
+            if text == prompt:
+                similarities.append(1.0)
+                exact.append(output is not None and row.get("output") == output)
+            else:
+                exact.append(False)
+                words = set(text.lower().split())
+                union = prompt_words | words
+                similarities.append(len(prompt_words & words) / len(union) if union else 0.0)
+        return Candidates(
+            models=np.array([row["model"] for row in rows], dtype=str),
+            scores=np.array([row["validation_score"] for row in rows], dtype=np.float32),
+            similarities=np.array(similarities, dtype=np.float32),
+            exact=np.array(exact, dtype=bool)
+        )
+    
+    def _known_exact_match(self, prompt: str, model: str, scenario: str, output: str) -> Optional[CacheResult]:
+        """Level 1 from the DB's in-process index of stored validations"""
+        known = self.db.find_exact(prompt, model, scenario, output)
+        if known is None:
+            return None
+        
+        score, sample_count = known
+        return CacheResult(
+            score=score,
+            confidence="HIGH",
+            source="exact_match",
+            method="historical_db",
+            reasoning="Exact match found (similarity: 1.00)",
+            sample_count=sample_count
+        )
+    
     def _exact_match(
         self, 
-        prompt: str, 
-        model: str, 
-        scenario: str
+        candidates: Candidates, 
+        model: str
     ) -> Optional[CacheResult]:
-        """Level 1: Exact match lookup"""
-        result = self.db.find_similar(
-            prompt_text=prompt,
-            model=model,
-            scenario=scenario,
-            limit=1
-        )
-        
-        if result and result.avg_score is not None:
-            # Exact match if similarity very high
-            if hasattr(result, 'similarity') and result.similarity >= 0.95:
-                return CacheResult(
-                    score=result.avg_score,
-                    confidence="HIGH",
-                    source="exact_match",
-                    method="historical_db",
-                    reasoning=f"Exact match found (similarity: {result.similarity:.2f})",
-                    sample_count=result.count if hasattr(result, 'count') else 1
-                )
+        """Level 1: Exact match lookup (same prompt text and same output)"""
+        mask = (candidates.models == model) & candidates.exact
+        if not mask.any():
+            return None
         
-        return None
+        return CacheResult(
+            score=float(candidates.scores[mask].mean()),
+            confidence="HIGH",
+            source="exact_match",
+            method="historical_db",
+            reasoning="Exact match found (similarity: 1.00)",
+            sample_count=int(mask.sum())
+        )
     
     def _scenario_similar(
         self, 
-        prompt: str, 
-        model: str, 
-        scenario: str
+        candidates: Candidates, 
+        model: str
     ) -> Optional[CacheResult]:
-        """Level 2: Similar prompt in same scenario"""
-        result = self.db.find_similar(
-            prompt_text=prompt,
-            model=model,
-            scenario=scenario,
-            limit=5
-        )
-        
-        if result and result.avg_score is not None:
-            # Accept if similarity is good
-            similarity = getattr(result, 'similarity', 0.0)
-            if similarity >= 0.85:
-                return CacheResult(
-                    score=result.avg_score,
-                    confidence="HIGH",
-                    source="scenario_similar",
-                    method="historical_db",
-                    reasoning=f"Similar prompt in same scenario (similarity: {similarity:.2f})",
-                    sample_count=result.count if hasattr(result, 'count') else 1
-                )
+        """Level 2: Similar prompt in same scenario (a prior for the output's own checks, not a verdict)"""
+        mask = (candidates.models == model) & (candidates.similarities >= 0.85)
+        if not mask.any():
+            return None
         
-        return None
+        similarity = candidates.similarities[mask].max()
+        return CacheResult(
+            score=float(candidates.scores[mask].mean()),
+            confidence="MEDIUM",
+            source="scenario_similar",
+            method="historical_db",
+            reasoning=f"Similar prompt in same scenario (similarity: {similarity:.2f})",
+            sample_count=int(mask.sum())
+        )
     
     def _model_family_match(
         self, 
-        prompt: str, 
-        model: str, 
-        scenario: str
+        candidates: Candidates, 
+        family: str,
+        family_models: np.ndarray
     ) -> Optional[CacheResult]:
         """Level 3: Model family transfer"""
-        family = get_model_family(model)
-        
-        if family == "unknown":
+        if family == "unknown" or not family_models.size:
             return None
         
-        family_models = get_family_models(family)
         confidence_mult = get_transfer_confidence(family)
         
-        # Try each family member
-        for family_model in family_models:
-            if family_model == model:
-                continue  # Skip same model (already tried in Level 1/2)
-            
-            result = self.db.find_similar(
-                prompt_text=prompt,
-                model=family_model,
-                scenario=scenario,
-                limit=3
-            )
-            
-            if result and result.avg_score is not None:
-                sample_count = result.count if hasattr(result, 'count') else 1
-                
-                # Need at least 3 samples for family transfer
-                if sample_count >= 3:
-                    # Adjust score based on family confidence
-                    adjusted_score = result.avg_score * confidence_mult
-                    adjustment = result.avg_score - adjusted_score
-                    
-                    return CacheResult(
-                        score=adjusted_score,
-                        confidence="MEDIUM",
-                        source="model_family",
-                        method="family_transfer",
-                        reasoning=f"Transferred from {family_model} ({sample_count} samples, {confidence_mult:.0%} confidence)",
-                        sample_count=sample_count,
-                        adjustment=-adjustment
-                    )
+        # Similar-prompt samples per family member (rows x members membership matrix),
+        # with every member's average and confidence-adjusted score in one pass
+        similar = candidates.similarities >= 0.85
+        samples = (candidates.models[:, np.newaxis] == family_models) & similar[:, np.newaxis]
+        counts = samples.sum(axis=0)
+        avg_scores = (candidates.scores @ samples) / np.maximum(counts, 1)
+        adjusted_scores = avg_scores * confidence_mult
         
-        return None
+        # Need at least 3 samples for family transfer; take the first member in family order
+        eligible = np.flatnonzero(counts >= 3)
+        if not eligible.size:
+            return None
+        member = int(eligible[0])
+        family_model = str(family_models[member])
+        sample_count = int(counts[member])
+        adjusted_score = float(adjusted_scores[member])
+        adjustment = float(avg_scores[member]) - adjusted_score
+        
+        return CacheResult(
+            score=adjusted_score,
+            confidence="MEDIUM",
+            source="model_family",
+            method="family_transfer",
+            reasoning=f"Transferred from {family_model} ({sample_count} samples, {confidence_mult:.0%} confidence)",
+            sample_count=sample_count,
+            adjustment=-adjustment
+        )
     
     def _scenario_baseline(self, scenario: str) -> Optional[CacheResult]:
         """Level 4: Scenario average (use sparingly)"""
@@ -3,6 +3,7 @@ Example Usage: Multi-Method Validation System
 Demonstrates how to use the hybrid validator with LLM judge, heuristics, and historical DB
 """
 
+import asyncio
 import json
 from schemas import HistoricalPrompt, ReplayRequest
 from replay_engine import replay_engine
@@ -11,7 +12,7 @@ from recommender import recommendation_engine
 from validator.hybrid_validator import hybrid_validator
 
 # Example 1: Simple model comparison with validation
-def example_basic_validation():
+async def example_basic_validation():
     """Test multiple models on sample prompts with automatic validation"""
     
     print("="*70)
@@ -42,7 +43,8 @@ def example_basic_validation():
     
     # Replay with validation enabled
     print(f"\nTesting {len(models)} models on {len(prompts)} prompts...")
-    results = replay_engine.replay_batch(
+    # All prompt x model calls run concurrently, so this takes about as long as the slowest call
+    results = await replay_engine.replay_batch_async(
         prompts=prompts,
         models=models,
         use_validation=True,  # Enable hybrid validation
@@ -95,7 +97,7 @@ def example_basic_validation():
 
 
 # Example 2: Production mode (minimal LLM judge usage)
-def example_production_mode():
+async def example_production_mode():
     """Production usage with cost-optimized validation"""
     
     print("\n\n" + "="*70)
@@ -114,7 +116,7 @@ def example_production_mode():
     models = ["gpt-4o-mini"]
     
     print(f"\nReplaying {len(prompts)} prompts in production mode...")
-    results = replay_engine.replay_batch(
+    results = await replay_engine.replay_batch_async(
         prompts=prompts,
         models=models,
         use_validation=True,
@@ -135,7 +137,7 @@ def example_production_mode():
 
 
 # Example 3: Direct validation testing
-def example_direct_validation():
+async def example_direct_validation():
     """Test validation methods directly"""
     
     print("\n\n" + "="*70)
@@ -153,17 +155,18 @@ def example_direct_validation():
         "error": "Error: Failed to process request"
     }
     
-    for label, output in outputs.items():
+    # Validate every output in one batch: shared DB lookups, overlapping judge calls
+    validations = await hybrid_validator.validate_many(
+        prompts=[prompt] * len(outputs),
+        outputs=list(outputs.values()),
+        models=["test-model"] * len(outputs),
+        phase="discovery"
+    )
+    
+    for (label, output), validation in zip(outputs.items(), validations):
         print(f"\n\nTesting: {label}")
         print(f"Output: {output[:60]}...")
         
-        validation = hybrid_validator.validate(
-            prompt=prompt,
-            output=output,
-            model="test-model",
-            phase="discovery"
-        )
-        
         print(f"\nScore: {validation.score:.1f}/100")
         print(f"Method: {validation.method}")
         print(f"Confidence: {validation.confidence}")
@@ -171,11 +174,15 @@ def example_direct_validation():
         print(f"Methods used: {', '.join(validation.methods_used)}")
 
 
+async def main():
+    await example_basic_validation()
+    await example_production_mode()
+    await example_direct_validation()
+
+
 if __name__ == "__main__":
     # Run examples
-    example_basic_validation()
-    example_production_mode()
-    example_direct_validation()
+    asyncio.run(main())
     
     print("\n\n" + "="*70)
     print(" All Examples Complete!")
@@ -6,6 +6,7 @@ Fast, rule-based quality checks without LLM calls
 import logging
 import json
 import re
+from itertools import islice
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
@@ -24,7 +25,7 @@ class HeuristicScore(BaseModel):
 class HeuristicValidator:
     """Fast rule-based validation without LLM calls"""
     
-    # Common refusal patterns
+    # Common refusal phrases (all patterns are lowercase literals, matched as substrings)
     REFUSAL_PATTERNS = [
         r"i cannot",
         r"i can't",
@@ -41,7 +42,7 @@ class HeuristicValidator:
         r"as a language model"
     ]
     
-    # Error indicators
+    # Error indicators (lowercase literals)
     ERROR_PATTERNS = [
         r"error:",
         r"exception:",
@@ -52,6 +53,19 @@ class HeuristicValidator:
         r"stack trace"
     ]
     
+    # Outputs shorter than the shortest phrase can't contain any of them
+    _MIN_REFUSAL_LEN = min(map(len, REFUSAL_PATTERNS))
+    _MIN_ERROR_LEN = min(map(len, ERROR_PATTERNS))
+    
+    # Script ranges checked in order by _detect_language
+    _LANGUAGE_RES = [
+        ("zh", re.compile(r'[\u4e00-\u9fff]')),  # Chinese
+        ("ar", re.compile(r'[\u0600-\u06ff]')),  # Arabic
+        ("ru", re.compile(r'[\u0400-\u04ff]')),  # Cyrillic/Russian
+        ("ja", re.compile(r'[\u3040-\u309f\u30a0-\u30ff]')),  # Japanese
+    ]
+    _SENTENCE_END_RE = re.compile(r'[.!?]+\s')
+    
     def validate(
         self, 
         output: str, 
@@ -76,7 +90,8 @@ class HeuristicValidator:
         checks_passed = []
         checks_failed = []
         
-        if not output or len(output.strip()) == 0:
+        stripped = output.strip() if output else ""
+        if not stripped:
             return HeuristicScore(
                 score=0,
                 confidence="HIGH",
@@ -84,8 +99,11 @@ class HeuristicValidator:
                 checks_failed=["non_empty"]
             )
         
+        # Patterns are lowercase literals, so lowercase once and use plain substring search
+        output_lower = output.lower()
+        
         # Check 1: Not a refusal
-        if self._is_refusal(output):
+        if self._is_refusal(output_lower):
             score = 0
             confidence = "HIGH"
             checks_failed.append("refusal_check")
@@ -106,7 +124,7 @@ class HeuristicValidator:
             checks_passed.append("length_check")
         
         # Check 3: No error messages
-        if self._contains_errors(output):
+        if self._contains_errors(output_lower):
             score -= 30
             checks_failed.append("error_check")
         else:
@@ -130,7 +148,7 @@ class HeuristicValidator:
             checks_passed.append("language_check")
         
         # Check 6: Formatting quality
-        formatting_score = self._check_formatting(output)
+        formatting_score = self._check_formatting(output, stripped)
         score += (formatting_score - 50) * 0.2  # Small influence
         if formatting_score > 60:
             checks_passed.append("formatting_check")
@@ -158,31 +176,50 @@ class HeuristicValidator:
             checks_failed=checks_failed
         )
     
-    def _is_refusal(self, output: str) -> bool:
-        """Check if output is a refusal"""
-        output_lower = output.lower()
-        for pattern in self.REFUSAL_PATTERNS:
-            if re.search(pattern, output_lower):
-                return True
-        return False
+    def validate_many(
+        self,
+        outputs: List[str],
+        expected_schema: Optional[dict] = None,
+        min_length: int = 10,
+        expected_language: str = "en"
+    ) -> List[HeuristicScore]:
+        """
+        Run all heuristic checks on a batch of outputs
+        
+        Identical outputs (retries, the same answer from several models) are
+        validated once and share their HeuristicScore.
+        
+        Returns:
+            HeuristicScores in the same order as outputs
+        """
+        scores = {
+            output: self.validate(output, expected_schema, min_length, expected_language)
+            for output in dict.fromkeys(outputs)
+        }
+        return [scores[output] for output in outputs]
     
-    def _contains_errors(self, output: str) -> bool:
-        """Check if output contains error messages"""
-        output_lower = output.lower()
-        for pattern in self.ERROR_PATTERNS:
-            if re.search(pattern, output_lower):
-                return True
-        return False
+    def _is_refusal(self, output_lower: str) -> bool:
+        """Check if (lowercased) output is a refusal"""
+        if len(output_lower) < self._MIN_REFUSAL_LEN:
+            return False
+        return any(pattern in output_lower for pattern in self.REFUSAL_PATTERNS)
+    
+    def _contains_errors(self, output_lower: str) -> bool:
+        """Check if (lowercased) output contains error messages"""
+        if len(output_lower) < self._MIN_ERROR_LEN:
+            return False
+        return any(pattern in output_lower for pattern in self.ERROR_PATTERNS)
     
     def _validate_schema(self, output: str, schema: dict) -> bool:
         """Validate JSON structure against schema"""
         try:
             data = json.loads(output)
             # Simple schema validation (can be enhanced)
-            for key in schema.get("required", []):
-                if key not in data:
-                    return False
-            return True
+            required = schema.get("required", [])
+            if isinstance(data, dict):
+                # Key views compare as sets, so this is one C-level subset check
+                return data.keys() >= set(required)
+            return all(key in data for key in required)
         except (json.JSONDecodeError, TypeError):
             return False
     
@@ -192,22 +229,18 @@ class HeuristicValidator:
         Returns: ISO language code
         """
         # Very basic detection - in production use langdetect or similar
-        text_lower = text.lower()
+        # Pure-ASCII text (the common case) can't contain any of the scripts below
+        if text.isascii():
+            return "en"
         
-        # Check for common non-English patterns
-        if re.search(r'[\u4e00-\u9fff]', text):  # Chinese
-            return "zh"
-        elif re.search(r'[\u0600-\u06ff]', text):  # Arabic
-            return "ar"
-        elif re.search(r'[\u0400-\u04ff]', text):  # Cyrillic/Russian
-            return "ru"
-        elif re.search(r'[\u3040-\u309f\u30a0-\u30ff]', text):  # Japanese
-            return "ja"
+        for language, script_re in self._LANGUAGE_RES:
+            if script_re.search(text):
+                return language
         
         # Default to English
         return "en"
     
-    def _check_formatting(self, output: str) -> float:
+    def _check_formatting(self, output: str, stripped: Optional[str] = None) -> float:
         """
         Check formatting quality (0-100)
         Considers: capitalization, punctuation, paragraphs
@@ -219,7 +252,7 @@ class HeuristicValidator:
             score += 10
         
         # Ends with punctuation
-        if output.strip()[-1] in ".!?":
+        if (stripped if stripped is not None else output.strip())[-1] in ".!?":
             score += 10
         
         # Has paragraphs (multiple lines)
@@ -230,8 +263,8 @@ class HeuristicValidator:
         if not output.isupper():
             score += 10
         
-        # Has proper sentences
-        sentence_count = len(re.findall(r'[.!?]+\s', output))
+        # Has proper sentences (the bonus caps at 5, so stop counting there)
+        sentence_count = sum(1 for _ in islice(self._SENTENCE_END_RE.finditer(output), 5))
         if sentence_count > 0:
             score += min(10, sentence_count * 2)
         
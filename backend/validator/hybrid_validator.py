@@ -3,9 +3,17 @@ Hybrid Validator
 Combines multiple validation methods with intelligent fallback
 """
 
+import asyncio
+import atexit
+import collections
+import concurrent.futures
 import logging
+import queue
 import random
-from typing import Optional
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from cachetools import LRUCache
 from pydantic import BaseModel, Field
 from backend.schemas import HistoricalPrompt
 from backend.llm_judge import llm_judge
@@ -14,12 +22,50 @@ from backend.validator.heuristic_validator import heuristic_validator, Heuristic
 from backend.db.historical_db import historical_db, DBResult
 from backend.classifier.scenario_classifier import scenario_classifier
 from backend.classifier.model_families import extract_provider, get_model_family
-from backend.classifier.scenario_config import get_scenario_config, should_use_llm_judge
+from backend.classifier.scenario_config import SCENARIO_CONFIG, should_use_llm_judge
 from backend.validator.cache_strategy import SmartCacheStrategy
 
 logger = logging.getLogger(__name__)
 
 
+# Long-lived loop for sync callers: its pooled HTTP client and judge clients are
+# reused across calls instead of rebuilt by a fresh asyncio.run each time
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) and return the background event loop used by _run_sync"""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="hybrid-validator-loop", daemon=True).start()
+    return _sync_loop
+
+
+def _run_sync(coro, timeout: float = 30):
+    """Run a coroutine to completion from sync code, even if a loop is already running"""
+    future = asyncio.run_coroutine_threadsafe(coro, _get_sync_loop())
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+class _Counters:
+    """One thread's validation counters (HybridValidator.get_stats sums them)"""
+    __slots__ = ("llm_judge_calls", "heuristic_calls", "heuristic_cache_hits", "db_hits", "db_misses")
+    
+    def __init__(self):
+        self.llm_judge_calls = 0
+        self.heuristic_calls = 0
+        self.heuristic_cache_hits = 0
+        self.db_hits = 0
+        self.db_misses = 0
+
+
 class ValidationScore(BaseModel):
     """Unified validation result"""
     score: float = Field(ge=0, le=100, description="Quality score 0-100")
@@ -58,15 +104,47 @@ class HybridValidator:
         self.llm_judge_budget = 10.0  # $10 max for LLM judge calls
         self.llm_judge_cost = 0.0
         self.llm_judge_sample_rate = 0.30  # 30% in discovery
-        
-        # Stats tracking
-        self.stats = {
-            "llm_judge_calls": 0,
-            "heuristic_calls": 0,
-            "db_hits": 0,
-            "db_misses": 0,
-            "spent_budget": 0.0
+        # (llm_judge, heuristic, db) score weights per scenario, read once from the config
+        self._weights = {
+            name: (
+                config.get("llm_judge_weight", 0.60),
+                config.get("heuristic_weight", 0.25),
+                config.get("db_weight", 0.15)
+            )
+            for name, config in SCENARIO_CONFIG.items()
         }
+        self.judge_batch_concurrency = 10  # judge calls in flight per validate_many batch
+        # Above 90% of this many judge calls per minute, sampling narrows to outputs
+        # the heuristics find uncertain, so bursts don't run into provider RPM limits
+        self.judge_rpm_limit = 300
+        self._judge_window = collections.deque()  # monotonic times of recent judge calls
+        
+        # Stats tracking: validations run on several threads, so each thread bumps
+        # its own counters lock-free and get_stats sums them; the judge budget
+        # check-and-reserve still needs the lock
+        self._local = threading.local()
+        self._all_counters: List[_Counters] = []
+        self._stats_lock = threading.Lock()
+        
+        # Heuristic scores by output text: retries and the same answer across models
+        # recur often, and the checks depend only on the text (keyed by the full
+        # string, so a hash collision can't return another output's score)
+        self._heuristic_cache = LRUCache(maxsize=4096)
+        self._heuristic_lock = threading.Lock()
+        
+        # Write buffering for batch replays: while any batch holds it open, results
+        # are stored in bulk every `storage_flush_every` rows instead of one POST each
+        self.storage_flush_every = 100
+        self._pending_rows = []
+        self._buffering = 0
+        self._storage_lock = threading.Lock()
+        
+        # Outside batches, rows go to a write-behind queue drained by a daemon thread
+        # (up to `storage_flush_every` rows or `write_behind_delay` seconds per bulk
+        # insert), so validate() never waits on the DB write
+        self.write_behind_delay = 0.2
+        self._write_queue = queue.Queue(maxsize=10_000)
+        self._writer = None
         
         logger.info("HybridValidator initialized")
     
@@ -91,28 +169,141 @@ class HybridValidator:
         Returns:
             ValidationScore with consolidated result
         """
+        early_result, context = self._validate_before_judge(prompt, output, model, force_llm_judge)
+        if early_result:
+            return early_result
+        
+        judge_result = self._run_llm_judge(prompt, output, model) if context["use_judge"] else None
+        return self._validate_after_judge(prompt, output, model, context, judge_result)
+    
+    async def validate_async(
+        self,
+        prompt: HistoricalPrompt,
+        output: str,
+        model: str,
+        phase: str = "discovery",
+        force_llm_judge: bool = False
+    ) -> ValidationScore:
+        """
+        Async twin of validate for callers already on an event loop
+        
+        The LLM judge call is awaited on the caller's loop (sharing its connection
+        pool with replay traffic); the blocking DB/heuristic steps run on a thread.
+        """
+        return await self._validate_async(prompt, output, model, force_llm_judge)
+    
+    async def validate_many(
+        self,
+        prompts: List[HistoricalPrompt],
+        outputs: List[str],
+        models: List[str],
+        phase: str = "discovery"
+    ) -> List[ValidationScore]:
+        """
+        Validate many (prompt, output, model) triples concurrently
+        
+        Scenarios are classified once per distinct prompt and DB candidates are
+        fetched once per (model, scenario), so a batch of N items against one model
+        costs a handful of DB round trips instead of N. Cache lookups and heuristics
+        run for every item first; only the items that still need the LLM judge are
+        then sent to it as one batch, at most `judge_batch_concurrency` at a time.
+        """
+        prompt_texts = [self._format_prompt(prompt) for prompt in prompts]
+        unique_texts = list(dict.fromkeys(prompt_texts))
+        scenario_of = dict(zip(unique_texts, self.scenario_classifier.classify_batch(unique_texts)))
+        scenarios = [scenario_of[text] for text in prompt_texts]
+        
+        keys = list(dict.fromkeys(zip(models, scenarios)))
+        fetched = await asyncio.gather(*(
+            asyncio.to_thread(self.cache_strategy.fetch_candidates, model, scenario)
+            for model, scenario in keys
+        ))
+        rows_for = dict(zip(keys, fetched))
+        
+        # Steps 1-3 (scenario, cache, heuristics) for every item
+        before = await asyncio.gather(*(
+            asyncio.to_thread(
+                self._validate_before_judge, prompt, output, model, False,
+                scenario, rows_for[model, scenario], prompt_text
+            )
+            for prompt, output, model, scenario, prompt_text in zip(prompts, outputs, models, scenarios, prompt_texts)
+        ))
+        
+        # Step 4: one judge batch for the items that still need it
+        judge_queue = [i for i, (early_result, context) in enumerate(before) if not early_result and context["use_judge"]]
+        judged = await self._run_llm_judge_batch_async([(prompts[i], outputs[i], models[i]) for i in judge_queue])
+        judge_results = dict(zip(judge_queue, judged))
+        
+        async def finish(i: int) -> ValidationScore:
+            early_result, context = before[i]
+            if early_result:
+                return early_result
+            return await asyncio.to_thread(
+                self._validate_after_judge, prompts[i], outputs[i], models[i], context, judge_results.get(i)
+            )
+        
+        return await asyncio.gather(*(finish(i) for i in range(len(before))))
+    
+    async def _validate_async(
+        self,
+        prompt: HistoricalPrompt,
+        output: str,
+        model: str,
+        force_llm_judge: bool,
+        scenario: Optional[str] = None,
+        candidate_rows: Optional[List[Dict]] = None,
+        prompt_text: Optional[str] = None
+    ) -> ValidationScore:
+        early_result, context = await asyncio.to_thread(
+            self._validate_before_judge, prompt, output, model, force_llm_judge, scenario, candidate_rows, prompt_text
+        )
+        if early_result:
+            return early_result
+        
+        judge_result = await self._run_llm_judge_async(prompt, output, model) if context["use_judge"] else None
+        return await asyncio.to_thread(
+            self._validate_after_judge, prompt, output, model, context, judge_result
+        )
+    
+    def _validate_before_judge(
+        self,
+        prompt: HistoricalPrompt,
+        output: str,
+        model: str,
+        force_llm_judge: bool,
+        scenario: Optional[str] = None,
+        candidate_rows: Optional[List[Dict]] = None,
+        prompt_text: Optional[str] = None
+    ) -> Tuple[Optional[ValidationScore], dict]:
+        """
+        Cache lookup and heuristics - everything that runs before the LLM judge
+        
+        Returns:
+            (final score if no judge is needed, context for _validate_after_judge)
+        """
         methods_used = []
         
         # Step 1: Classify scenario
-        prompt_text = self._format_prompt(prompt)
-        scenario = self.scenario_classifier.classify(prompt_text)
-        scenario_config = get_scenario_config(scenario)
+        if prompt_text is None:
+            prompt_text = self._format_prompt(prompt)
+        if scenario is None:
+            scenario = self.scenario_classifier.classify(prompt_text)
         
         # Step 2: Smart Cache Lookup (4-level)
         cache_result = self.cache_strategy.lookup(
             prompt=prompt_text,
             model=model,
             scenario=scenario,
-            min_confidence="MEDIUM"  # Accept MEDIUM or higher
+            min_confidence="MEDIUM",  # Accept MEDIUM or higher
+            candidate_rows=candidate_rows,
+            output=output
         )
         
         if cache_result and cache_result.confidence == "HIGH":
             # High confidence from smart cache
-            self.stats["db_hits"] += 1
-            
-            # Cache result, store for future
-            self._cache_result(prompt, output, model, cache_result.score, cache_result.method, cache_result.confidence, scenario)
+            self._counters().db_hits += 1
             
+            # Not stored again: a copy of a stored score would inflate its sample count
             return ValidationScore(
                 score=cache_result.score,
                 method=cache_result.source,
@@ -120,12 +311,12 @@ class HybridValidator:
                 reasoning=cache_result.reasoning,
                 db_score=cache_result.score,
                 methods_used=[cache_result.source]
-            )
+            ), {}
         
         if cache_result:
             methods_used.append(cache_result.source)
         else:
-            self.stats["db_misses"] += 1
+            self._counters().db_misses += 1
         
         # Step 3: Run Heuristics (always - fast and free!)
         heuristic_result = self._run_heuristics(output)
@@ -139,11 +330,11 @@ class HybridValidator:
                 score = self._combine_scores(
                     heuristic_score=heuristic_result.score,
                     db_score=cache_result.score if cache_result else None,
-                    scenario_config=scenario_config
+                    scenario=scenario
                 )
                 
                 # Store result
-                self._cache_result(prompt, output, model, score, "heuristics", "HIGH", scenario)
+                self._cache_result(prompt, output, model, score, "heuristics", "HIGH", scenario, prompt_text)
                 
                 return ValidationScore(
                     score=score,
@@ -153,42 +344,64 @@ class HybridValidator:
                     heuristic_score=heuristic_result.score,
                     db_score=cache_result.score if cache_result else None,
                     methods_used=methods_used
-                )
+                ), {}
         
         # Step 4: LLM Judge (expensive, use strategically with scenario config)
         should_use_judge = force_llm_judge or should_use_llm_judge(
             scenario=scenario,
             db_confidence=cache_result.confidence if cache_result else None
         )
+        if should_use_judge and not force_llm_judge and self._judge_saturated():
+            should_use_judge = 40 <= heuristic_result.score <= 60
+        
+        return None, {
+            "prompt_text": prompt_text,
+            "scenario": scenario,
+            "cache_result": cache_result,
+            "heuristic_result": heuristic_result,
+            "methods_used": methods_used,
+            "use_judge": should_use_judge and self.use_llm_judge,
+        }
+    
+    def _validate_after_judge(
+        self,
+        prompt: HistoricalPrompt,
+        output: str,
+        model: str,
+        context: dict,
+        judge_result: Optional[JudgeScore]
+    ) -> ValidationScore:
+        """Combine the judge verdict (if any) with heuristics and DB, then store it"""
+        scenario = context["scenario"]
+        cache_result = context["cache_result"]
+        heuristic_result = context["heuristic_result"]
+        methods_used = context["methods_used"]
         
-        if should_use_judge and self.use_llm_judge:
-            judge_result = self._run_llm_judge(prompt, output, model)
+        if judge_result:
+            methods_used.append("llm_judge")
             
-            if judge_result:
-                methods_used.append("llm_judge")
-                
-                # Combine all available scores
-                score = self._combine_scores(
-                    llm_judge_score=judge_result.score,
-                    heuristic_score=heuristic_result.score,
-                    db_score=cache_result.score if cache_result else None,
-                    scenario_config=scenario_config
-                )
-                
-                # Store result in database
-                self._cache_result(prompt, output, model, score, "ensemble", "HIGH", scenario)
-                
-                # Cache this result for future lookups
-                return ValidationScore(
-                    score=score,
-                    method="ensemble",
-                    confidence="HIGH",
-                    reasoning=judge_result.reasoning,
-                    llm_judge_score=judge_result.score,
-                    heuristic_score=heuristic_result.score,
-                    db_score=cache_result.score if cache_result else None,
-                    methods_used=methods_used
-                )
+            # Combine all available scores
+            score = self._combine_scores(
+                llm_judge_score=judge_result.score,
+                heuristic_score=heuristic_result.score,
+                db_score=cache_result.score if cache_result else None,
+                scenario=scenario
+            )
+            
+            # Store result in database
+            self._cache_result(prompt, output, model, score, "ensemble", "HIGH", scenario, context["prompt_text"])
+            
+            # Cache this result for future lookups
+            return ValidationScore(
+                score=score,
+                method="ensemble",
+                confidence="HIGH",
+                reasoning=judge_result.reasoning,
+                llm_judge_score=judge_result.score,
+                heuristic_score=heuristic_result.score,
+                db_score=cache_result.score if cache_result else None,
+                methods_used=methods_used
+            )
         
         # Fallback: Use heuristics + DB
         score = self._combine_scores(
@@ -199,7 +412,7 @@ class HybridValidator:
         confidence = "MEDIUM" if cache_result else heuristic_result.confidence
         
         # Cache heuristic result (fix: correct parameter order)
-        self._cache_result(prompt, output, model, score, "heuristics", confidence, scenario)
+        self._cache_result(prompt, output, model, score, "heuristics", confidence, scenario, context["prompt_text"])
         
         return ValidationScore(
             score=score,
@@ -221,9 +434,18 @@ class HybridValidator:
             return None
     
     def _run_heuristics(self, output: str) -> HeuristicScore:
-        """Run heuristic validation"""
-        self.stats["heuristic_calls"] += 1
-        return heuristic_validator.validate(output)
+        """Run heuristic validation, reusing the score of an identical earlier output"""
+        self._counters().heuristic_calls += 1
+        with self._heuristic_lock:
+            result = self._heuristic_cache.get(output)
+        if result is not None:
+            self._counters().heuristic_cache_hits += 1
+            return result
+        
+        result = heuristic_validator.validate(output)
+        with self._heuristic_lock:
+            self._heuristic_cache[output] = result
+        return result
     
     def _run_llm_judge(
         self, 
@@ -231,38 +453,23 @@ class HybridValidator:
         output: str, 
         model: str
     ) -> Optional[JudgeScore]:
-        """Run LLM judge evaluation (async-aware)"""
+        """Run LLM judge evaluation from synchronous code"""
+        return _run_sync(self._run_llm_judge_async(prompt, output, model))
+    
+    async def _run_llm_judge_async(
+        self,
+        prompt: HistoricalPrompt,
+        output: str,
+        model: str
+    ) -> Optional[JudgeScore]:
+        """Run LLM judge evaluation on the running event loop"""
         try:
-            import asyncio
-            
-            # Estimate cost (rough)
-            estimated_cost = 0.01  # ~$0.01 per judge call
-            
-            if self.llm_judge_cost + estimated_cost > self.llm_judge_budget:
-                logger.warning(f"LLM judge budget exhausted (${self.llm_judge_cost:.2f})")
+            if not self._reserve_judge_budget():
                 return None
             
-            # Call async function and handle coroutine
-            result = llm_judge.evaluate_single(prompt, output, model)
+            result = await llm_judge.evaluate_single(prompt, output, model)
             
-            # If it's a coroutine, run it
-            if hasattr(result, '__await__'):
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_running():
-                        # In running loop, use run_in_executor
-                        import concurrent.futures
-                        with concurrent.futures.ThreadPoolExecutor() as executor:
-                            future = executor.submit(asyncio.run, result)
-                            result = future.result(timeout=30)
-                    else:
-                        result = asyncio.run(result)
-                except RuntimeError:
-                    # No event loop, create one
-                    result = asyncio.run(result)
-            
-            self.stats["llm_judge_calls"] += 1
-            self.llm_judge_cost += estimated_cost
+            self._counters().llm_judge_calls += 1
             
             return result
             
@@ -270,6 +477,51 @@ class HybridValidator:
             logger.error(f"LLM judge failed: {e}")
             return None
     
+    async def _run_llm_judge_batch_async(
+        self,
+        items: List[Tuple[HistoricalPrompt, str, str]]
+    ) -> List[Optional[JudgeScore]]:
+        """Judge (prompt, output, model) items as one bounded batch; None where skipped or failed"""
+        results: List[Optional[JudgeScore]] = [None] * len(items)
+        reserved = [i for i in range(len(items)) if self._reserve_judge_budget()]
+        if not reserved:
+            return results
+        
+        try:
+            scores = await llm_judge.evaluate_batch(
+                [items[i] for i in reserved], max_concurrency=self.judge_batch_concurrency
+            )
+        except Exception as e:
+            logger.error(f"LLM judge batch failed: {e}")
+            return results
+        
+        self._counters().llm_judge_calls += len(reserved)
+        for i, score in zip(reserved, scores):
+            results[i] = score
+        return results
+    
+    def _reserve_judge_budget(self) -> bool:
+        """Reserve one judge call's estimated cost, or False once the budget is spent"""
+        # Estimate cost (rough)
+        estimated_cost = 0.01  # ~$0.01 per judge call
+        
+        # Reserve budget before awaiting so concurrent validations can't overshoot it
+        with self._stats_lock:
+            if self.llm_judge_cost + estimated_cost > self.llm_judge_budget:
+                logger.warning(f"LLM judge budget exhausted (${self.llm_judge_cost:.2f})")
+                return False
+            self.llm_judge_cost += estimated_cost
+            self._judge_window.append(time.monotonic())
+        return True
+    
+    def _judge_saturated(self) -> bool:
+        """True while judge calls over the last minute exceed 90% of judge_rpm_limit"""
+        cutoff = time.monotonic() - 60
+        with self._stats_lock:
+            while self._judge_window and self._judge_window[0] < cutoff:
+                self._judge_window.popleft()
+            return len(self._judge_window) > self.judge_rpm_limit * 0.9
+    
     def _should_use_llm_judge(self, phase: str) -> bool:
         """Decide whether to use LLM judge based on phase and sampling"""
         if phase == "discovery":
@@ -284,7 +536,7 @@ class HybridValidator:
         llm_judge_score: Optional[float] = None,
         heuristic_score: Optional[float] = None,
         db_score: Optional[float] = None,
-        scenario_config: dict = None
+        scenario: Optional[str] = None
     ) -> float:
         """
         Combine multiple scores using scenario-aware weighted average
@@ -293,29 +545,28 @@ class HybridValidator:
             llm_judge_score: Score from LLM judge (0-100)
             heuristic_score: Score from heuristics (0-100)
             db_score: Score from historical DB (0-100)
-            scenario_config: Scenario-specific configuration with weights
+            scenario: Scenario whose weights to use (default: general)
             
         Returns:
             Combined score (0-100)
         """
-        # Use default weights if no scenario_config
-        if scenario_config is None:
-            scenario_config = get_scenario_config("general")
+        # Unknown scenarios use the general weights, as get_scenario_config does
+        llm_judge_weight, heuristic_weight, db_weight = self._weights.get(scenario, self._weights["general"])
         
         scores = []
         weights = []
         
         if llm_judge_score is not None:
             scores.append(llm_judge_score)
-            weights.append(scenario_config.get("llm_judge_weight", 0.60))
+            weights.append(llm_judge_weight)
         
         if heuristic_score is not None:
             scores.append(heuristic_score)
-            weights.append(scenario_config.get("heuristic_weight", 0.25))
+            weights.append(heuristic_weight)
         
         if db_score is not None:
             scores.append(db_score)
-            weights.append(scenario_config.get("db_weight", 0.15))
+            weights.append(db_weight)
         
         if not scores:
             return 50.0  # Default neutral score
@@ -336,11 +587,13 @@ class HybridValidator:
         score: float,
         method: str,
         confidence: str,
-        scenario: str = None
+        scenario: str = None,
+        prompt_text: Optional[str] = None
     ):
-        """Cache validation result in historical DB"""
+        """Cache validation result in historical DB (prompt_text: already-formatted prompt, if known)"""
         try:
-            prompt_text = self._format_prompt(prompt)
+            if prompt_text is None:
+                prompt_text = self._format_prompt(prompt)
             
             # Auto-extract provider if not provided
             provider = extract_provider(model)
@@ -349,36 +602,129 @@ class HybridValidator:
             if scenario is None:
                 scenario = self.scenario_classifier.classify(prompt_text)
             
-            logger.info(f"Storing validation result: model={model}, score={score:.1f}, method={method}, confidence={confidence}")
-            
-            success = historical_db.store_validation(
-                prompt_text=prompt_text,
-                model=model,
-                provider=provider,
-                scenario=scenario,
-                output=output,
-                score=score,
-                method=method,
-                confidence=confidence
+            row = historical_db.validation_row(
+                prompt_text, model, provider, scenario, output, score, method, confidence
             )
+            if self._buffer_row(row):
+                return
             
-            if success:
-                logger.info(f"✅ Successfully cached validation result for {model}")
-            else:
-                logger.warning(f"⚠️ Failed to cache validation result for {model} - check logs above for details")
+            logger.info(f"Queueing validation result: model={model}, score={score:.1f}, method={method}, confidence={confidence}")
+            self._write_behind(row)
                 
         except Exception as e:
             logger.error(f"❌ Exception in _cache_result: {e}", exc_info=True)
     
+    def begin_buffered_storage(self):
+        """Start buffering DB writes (pair with end_buffered_storage)"""
+        with self._storage_lock:
+            self._buffering += 1
+    
+    def end_buffered_storage(self):
+        """Stop buffering for one caller; the last one out flushes what's left"""
+        with self._storage_lock:
+            self._buffering = max(0, self._buffering - 1)
+            rows = self._take_pending_rows() if self._buffering == 0 else []
+        self._flush_rows(rows)
+    
+    def _buffer_row(self, row: dict) -> bool:
+        """Queue a row if buffering is on; returns False when the caller should write it directly"""
+        with self._storage_lock:
+            if not self._buffering:
+                return False
+            self._pending_rows.append(row)
+            rows = self._take_pending_rows() if len(self._pending_rows) >= self.storage_flush_every else []
+        self._flush_rows(rows)
+        return True
+    
+    def _write_behind(self, row: dict):
+        """Queue a row for the background writer, starting it on first use"""
+        with self._storage_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="validation-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush_writes)
+        try:
+            self._write_queue.put_nowait(row)
+        except queue.Full:
+            logger.warning("⚠️ Validation write queue full, dropping result")
+    
+    def _writer_loop(self):
+        while True:
+            rows = []
+            flushed = None
+            item = self._write_queue.get()
+            deadline = time.monotonic() + self.write_behind_delay
+            while True:
+                if isinstance(item, threading.Event):
+                    flushed = item  # flush_writes marker: write what we have, then signal
+                    break
+                rows.append(item)
+                remaining = deadline - time.monotonic()
+                if len(rows) >= self.storage_flush_every or remaining <= 0:
+                    break
+                try:
+                    item = self._write_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            try:
+                self._flush_rows(rows)
+            finally:
+                if flushed:
+                    flushed.set()
+    
+    def flush_writes(self, timeout: float = 10):
+        """Block until every row queued so far is written (also runs at exit)"""
+        if self._writer is None:
+            return
+        # The writer drains the queue in order, so once it reaches this marker
+        # every row queued before it has been written
+        flushed = threading.Event()
+        try:
+            self._write_queue.put(flushed, timeout=timeout)
+        except queue.Full:
+            logger.warning("⚠️ Validation write queue still full, some results may not be stored")
+            return
+        if not flushed.wait(timeout):
+            logger.warning("⚠️ Timed out waiting for queued validation results to be stored")
+    
+    def _take_pending_rows(self) -> list:
+        rows, self._pending_rows = self._pending_rows, []
+        return rows
+    
+    def _flush_rows(self, rows: list):
+        if rows and not historical_db.store_validations_bulk(rows):
+            logger.warning(f"⚠️ Failed to cache {len(rows)} buffered validation results - check logs above for details")
+    
     def _format_prompt(self, prompt: HistoricalPrompt) -> str:
         """Format prompt for storage/lookup"""
         return " ".join(msg.get("content", "") for msg in prompt.messages)
     
+    def _counters(self) -> _Counters:
+        """This thread's counters, registered on first use"""
+        counters = getattr(self._local, "counters", None)
+        if counters is None:
+            counters = self._local.counters = _Counters()
+            with self._stats_lock:
+                self._all_counters.append(counters)
+        return counters
+    
+    @property
+    def stats(self) -> Dict:
+        """Counters summed over every thread that has validated"""
+        with self._stats_lock:
+            all_counters = list(self._all_counters)
+            spent = self.llm_judge_cost
+        stats = {name: sum(getattr(c, name) for c in all_counters) for name in _Counters.__slots__}
+        stats["spent_budget"] = spent
+        return stats
+    
     def get_stats(self):
         """Get validator statistics"""
+        stats = self.stats
         return {
-            **self.stats,
-            "llm_judge_cost": self.llm_judge_cost,
+            **stats,
+            "llm_judge_cost": stats["spent_budget"],
+            "scenario_cache": self.scenario_classifier.cache_info()._asdict(),
             "db_stats": historical_db.get_stats(),
             "judge_stats": llm_judge.get_stats()
         }